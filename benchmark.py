@@ -0,0 +1,538 @@
+from concurrency import AimdController
+from rateLimiter import RateLimiter
+from fixtureStore import FixtureStore
+from mockServer import MockServer
+from htmlParser import HtmlParser
+from pipeline import CardPipeline
+from tcgPocket import TGCPocket
+from releaseDates import ReleaseDateResolver
+from fetcher import Fetcher, Page
+from printGraph import PrintGraph
+from cardQuery import CardIndex
+from set import Set
+from bs4 import SoupStrainer
+from card import Card
+import tracemalloc
+import requests
+import argparse
+import time
+import re
+
+
+def measureParse(
+    content: bytes, parseOnly: SoupStrainer | None, repeat: int
+) -> tuple[float, int]:
+    """
+    Measure how long a page takes to parse and the memory its tree needs.
+
+    Args:
+        - content (bytes): The HTML of the page
+        - parseOnly (SoupStrainer | None): Regions to build, None for the whole page
+        - repeat (int): Number of times the page is parsed
+
+    Returns:
+        - tuple[float, int]: Mean seconds per parse and peak bytes allocated by one parse
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        HtmlParser.parse(content, parseOnly)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    soup = HtmlParser.parse(content, parseOnly)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del soup
+
+    return elapsed, peak
+
+
+def benchmarkParse(args: argparse.Namespace) -> None:
+    """
+    Compare full and partial parsing of saved pages.
+
+    Args:
+        - args (argparse.Namespace): The parsed command line
+
+    Returns:
+        - None
+    """
+    parseOnly = {
+        "card": Card.parseOnly,
+        "set": Set.parseOnly,
+        "sets": TGCPocket.parseOnly,
+    }[args.kind]
+
+    HtmlParser.setBackend(args.parser)
+    HtmlParser.partial = True
+
+    print(f"{'page':<40} {'mode':<8} {'ms/parse':>10} {'peak KiB':>10}")
+
+    for path in args.pages:
+        with open(path, "rb") as file:
+            content = file.read()
+
+        for mode, strainer in (("full", None), ("partial", parseOnly)):
+            elapsed, peak = measureParse(content, strainer, args.repeat)
+            print(f"{path:<40} {mode:<8} {elapsed * 1000:>10.2f} {peak / 1024:>10.0f}")
+
+
+def benchmarkMemory(args: argparse.Namespace) -> None:
+    """
+    Measure the memory retained by cards built from a saved page, failing above a limit.
+
+    A card that keeps its parsed tree retains over ten times the limit, so
+    the check catches a card page no longer being released.
+
+    Args:
+        - args (argparse.Namespace): The parsed command line
+
+    Returns:
+        - None
+    """
+    HtmlParser.setBackend(args.parser)
+
+    if args.page:
+        url = args.page
+        with open(args.page, "rb") as file:
+            content = file.read()
+    else:
+        # The recorded card with an ability, the largest of the fixtures
+        url = "https://pocket.limitlesstcg.com/cards/A1/7"
+        content = FixtureStore("fixtures", "replay").load(url)
+
+    tracemalloc.start()
+    cards = [Card.fromContent(url, content) for _ in range(args.cards)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    perCard = current / len(cards)
+    print(f"Cards kept: {len(cards)}")
+    print(f"Retained: {current / 1024:.0f} KiB ({perCard:.0f} bytes per card)")
+    print(f"Peak: {peak / 1024:.0f} KiB")
+
+    if perCard > args.max_bytes_per_card:
+        raise ValueError(
+            f"Cards retain {perCard:.0f} bytes each, over the limit of"
+            f" {args.max_bytes_per_card}"
+        )
+
+
+def benchmarkCards(args: argparse.Namespace) -> None:
+    """
+    Measure the extraction throughput of the recorded card pages, and the time of every setter.
+
+    Args:
+        - args (argparse.Namespace): The parsed command line
+
+    Returns:
+        - None
+    """
+    HtmlParser.setBackend(args.parser)
+    HtmlParser.partial = args.partial_parse
+
+    store = FixtureStore(args.fixtures, "replay")
+    pages = [
+        (url, store.load(url))
+        for url in store.getUrls()
+        if re.search(r"/cards/[^/]+/\d+$", url)
+    ]
+
+    if not pages:
+        raise ValueError(f"No card pages recorded in {args.fixtures}")
+
+    timings = {"parse": 0.0, **{setter: 0.0 for setter in Card.setters}}
+    start = time.perf_counter()
+
+    for url, content in pages:
+        cardInstance = Card.__new__(Card)
+        cardInstance.url = url
+
+        stepStart = time.perf_counter()
+        cardInstance.soup = HtmlParser.parse(content, Card.parseOnly)
+        timings["parse"] += time.perf_counter() - stepStart
+
+        for setter in Card.setters:
+            stepStart = time.perf_counter()
+            getattr(cardInstance, setter)()
+            timings[setter] += time.perf_counter() - stepStart
+
+        cardInstance.releaseSoup()
+
+    elapsed = time.perf_counter() - start
+
+    print(f"Cards: {len(pages)}, {len(pages) / elapsed:.1f} cards/second")
+    print(f"{'step':<24} {'ms/card':>10} {'share':>8}")
+
+    for step, total in timings.items():
+        print(f"{step:<24} {total * 1000 / len(pages):>10.3f} {total / elapsed:>8.1%}")
+
+
+def extractPage(url: str, content: bytes, printGraph: PrintGraph) -> dict:
+    """
+    Extract the data of a recorded card, set or sets page, like a scrape would.
+
+    Args:
+        - url (str): The URL of the page
+        - content (bytes): The HTML of the page
+        - printGraph (PrintGraph): Prints of the cards already extracted
+
+    Returns:
+        - dict: The extracted data
+    """
+    if re.search(r"/cards/[^/]+/\d+$", url):
+        return Card(url, page=Page(url, content), printGraph=printGraph).getData()
+
+    if re.search(r"/cards/[^/]+$", url):
+        setInstance = Set.__new__(Set)
+        setInstance.url = url
+        setInstance.resolver = ReleaseDateResolver.getDefault()
+        setInstance.soup = HtmlParser.parse(content, Set.parseOnly)
+        setInstance.setAll()
+
+        return {
+            "name": setInstance.name,
+            "release_date": setInstance.date,
+            "card_count": setInstance.cardCount,
+            "card_urls": setInstance.cardUrls,
+        }
+
+    pocket = TGCPocket.__new__(TGCPocket)
+    pocket.url = url
+    pocket.setFilter = None
+    pocket.soup = HtmlParser.parse(content, TGCPocket.parseOnly)
+    pocket.setSetLinks()
+
+    return {"set_links": pocket.setLinks}
+
+
+def checkParity(args: argparse.Namespace) -> None:
+    """
+    Check that every parser backend, with full and partial parsing, extracts the same data.
+
+    The data of every recorded card, set and sets page is compared with the
+    one of html.parser on the full page, and the fields that differ, or the
+    error raised, are listed. Every mode shares a print graph between its
+    pages, so the reprints among them go through the reprint path too.
+
+    Args:
+        - args (argparse.Namespace): The parsed command line
+
+    Returns:
+        - None
+    """
+    store = FixtureStore(args.fixtures, "replay")
+    pages = [(url, store.load(url)) for url in sorted(store.getUrls())]
+
+    if not pages:
+        raise ValueError(f"No pages recorded in {args.fixtures}")
+
+    modes = [
+        (backend, partial)
+        for backend in HtmlParser.backends
+        for partial in (False, True)
+    ]
+    HtmlParser.setBackend("html.parser")
+    HtmlParser.partial = False
+    printGraph = PrintGraph()
+    expected = {url: extractPage(url, content, printGraph) for url, content in pages}
+    mismatches = 0
+
+    for backend, partial in modes:
+        HtmlParser.setBackend(backend)
+        HtmlParser.partial = partial
+        printGraph = PrintGraph()
+        differing = 0
+
+        for url, content in pages:
+            try:
+                data = extractPage(url, content, printGraph)
+            except Exception as error:
+                differing += 1
+                print(f"  {url}: {type(error).__name__}: {error}")
+                continue
+
+            fields = [
+                field
+                for field in expected[url].keys() | data.keys()
+                if expected[url].get(field) != data.get(field)
+            ]
+            if fields:
+                differing += 1
+                print(f"  {url}: {', '.join(sorted(fields))}")
+
+        mode = "partial" if partial else "full"
+        print(
+            f"{backend:<12} {mode:<8} {len(pages) - differing}/{len(pages)} identical"
+        )
+        mismatches += differing
+
+    if mismatches:
+        raise ValueError(
+            f"{mismatches} extractions differ from html.parser on the full page"
+        )
+
+
+def benchmarkScrape(args: argparse.Namespace) -> None:
+    """
+    Measure the wall time of a whole scrape replayed from recorded pages.
+
+    Args:
+        - args (argparse.Namespace): The parsed command line
+
+    Returns:
+        - None
+    """
+    HtmlParser.setBackend(args.parser)
+    HtmlParser.partial = args.partial_parse
+
+    fetcher = Fetcher(fixtures=FixtureStore(args.fixtures, "replay"))
+    pipeline = (
+        CardPipeline(fetcher, ioWorkers=args.workers, parseWorkers=args.parse_workers)
+        if args.parse_workers
+        else None
+    )
+
+    start = time.perf_counter()
+    pocket = TGCPocket(workers=args.workers, fetcher=fetcher, pipeline=pipeline)
+    elapsed = time.perf_counter() - start
+
+    if pipeline:
+        pipeline.close()
+
+    cardCount = len(pocket.getCardData())
+    print(f"Sets: {len(pocket.sets)}, cards: {cardCount}")
+    print(f"Wall time: {elapsed:.2f} s, {cardCount / elapsed:.1f} cards/second")
+
+
+def benchmarkLoad(args: argparse.Namespace) -> None:
+    """
+    Scrape recorded pages served by a local mock server at several concurrency levels.
+
+    With --adaptive, every level is the maximum of an AIMD controller, and
+    the window the controller ended on is reported.
+
+    Args:
+        - args (argparse.Namespace): The parsed command line
+
+    Returns:
+        - None
+    """
+    server = MockServer(
+        FixtureStore(args.fixtures, "replay"),
+        latency=args.latency,
+        jitter=args.jitter,
+        errorRate=args.error_rate,
+        throttleRate=args.throttle_rate,
+    )
+    server.start()
+    ReleaseDateResolver.url = f"{server.url}/tcgpocket/"
+
+    print(
+        f"{'workers':>8} {'result':>14} {'seconds':>9} {'cards/s':>9}"
+        f" {'requests':>9} {'503':>6} {'429':>6} {'window':>7}"
+    )
+
+    for workers in args.workers:
+        fetcher = Fetcher(
+            rateLimiter=RateLimiter(rate=args.rate, burst=args.burst),
+            poolSize=max(10, workers),
+            retries=args.retries,
+            backoff=args.backoff,
+        )
+        controller = (
+            AimdController(initial=min(4, workers), maximum=workers)
+            if args.adaptive
+            else None
+        )
+        before = dict(server.counts)
+        cardCount = 0
+        result = "ok"
+
+        start = time.perf_counter()
+        try:
+            pocket = TGCPocket(
+                url=f"{server.url}/cards",
+                workers=workers,
+                fetcher=fetcher,
+                controller=controller,
+            )
+            cardCount = len(pocket.getCardData())
+        except requests.RequestException as error:
+            result = type(error).__name__
+        elapsed = time.perf_counter() - start
+
+        counts = {name: server.counts[name] - before[name] for name in before}
+        window = f"{controller.window:.1f}" if controller else "-"
+        print(
+            f"{workers:>8} {result:>14} {elapsed:>9.2f} {cardCount / elapsed:>9.1f}"
+            f" {counts['requests']:>9} {counts['errors']:>6} {counts['throttled']:>6}"
+            f" {window:>7}"
+        )
+
+    server.stop()
+
+
+def benchmarkQuery(args: argparse.Namespace) -> None:
+    """
+    Compare indexed queries with a linear scan of a scraper output.
+
+    Args:
+        - args (argparse.Namespace): The parsed command line
+
+    Returns:
+        - None
+    """
+    start = time.perf_counter()
+    index = CardIndex.fromFile(args.cards)
+    print(
+        f"Cards: {len(index.cards)}, indexed in"
+        f" {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+
+    cardType, _ = index.getValues("type")[0]
+    rarity, _ = index.getValues("rarity")[0]
+    energy, _ = index.getValues("attack_cost")[0]
+    queries = {
+        f"type={cardType}": (
+            lambda: index.where(type=cardType).getCards(),
+            lambda c: c.get("type") == cardType,
+        ),
+        f"type={cardType}, rarity={rarity}": (
+            lambda: index.where(type=cardType, rarity=rarity).getCards(),
+            lambda c: c.get("type") == cardType and c.get("rarity") == rarity,
+        ),
+        f"attack_cost={energy}, hp 100-150": (
+            lambda: index.where(attack_cost=energy).between("hp", 100, 150).getCards(),
+            lambda c: any(energy in a.get("cost", []) for a in c.get("attacks") or [])
+            and isinstance(c.get("hp"), int)
+            and 100 <= c["hp"] <= 150,
+        ),
+        "ex, retreat <= 1": (
+            lambda: index.where(ex=True).between("retreat", high=1).getCards(),
+            lambda c: c.get("ex") is True
+            and isinstance(c.get("retreat"), int)
+            and c["retreat"] <= 1,
+        ),
+    }
+
+    print(f"{'query':<40} {'matches':>8} {'index µs':>10} {'scan µs':>10}")
+
+    for name, (indexed, predicate) in queries.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            matches = indexed()
+        indexedTime = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            scanned = [c for c in index.cards if predicate(c)]
+        scanTime = (time.perf_counter() - start) / args.repeat
+
+        if matches != scanned:
+            raise ValueError(f"Indexed query differs from the scan: {name}")
+
+        print(
+            f"{name:<40} {len(matches):>8} {indexedTime * 1e6:>10.1f}"
+            f" {scanTime * 1e6:>10.1f}"
+        )
+
+
+argParser = argparse.ArgumentParser(description="Benchmark the scraper offline")
+subParsers = argParser.add_subparsers(required=True)
+
+parseParser = subParsers.add_parser(
+    "parse", help="compare full and partial parsing of saved pages"
+)
+parseParser.add_argument("pages", nargs="+", help="saved HTML pages")
+parseParser.add_argument(
+    "--kind", choices=["card", "set", "sets"], default="card", help="kind of page"
+)
+parseParser.add_argument(
+    "--parser", choices=list(HtmlParser.backends), default=HtmlParser.backend
+)
+parseParser.add_argument("--repeat", type=int, default=20)
+parseParser.set_defaults(run=benchmarkParse)
+
+memoryParser = subParsers.add_parser(
+    "memory", help="check the memory retained by cards built from a saved page"
+)
+memoryParser.add_argument(
+    "page", nargs="?", help="saved card page, the recorded A1 #7 page by default"
+)
+memoryParser.add_argument(
+    "--parser", choices=list(HtmlParser.backends), default=HtmlParser.backend
+)
+memoryParser.add_argument("--cards", type=int, default=500)
+memoryParser.add_argument(
+    "--max-bytes-per-card",
+    type=int,
+    default=8192,
+    help="retained bytes per card above which the check fails (default: %(default)s)",
+)
+memoryParser.set_defaults(run=benchmarkMemory)
+
+cardsParser = subParsers.add_parser(
+    "cards", help="measure extraction throughput and setter timings on recorded pages"
+)
+cardsParser.add_argument("fixtures", help="directory of recorded pages")
+cardsParser.add_argument(
+    "--parser", choices=list(HtmlParser.backends), default=HtmlParser.backend
+)
+cardsParser.add_argument("--partial-parse", action="store_true")
+cardsParser.set_defaults(run=benchmarkCards)
+
+parityParser = subParsers.add_parser(
+    "parity", help="check that every parser backend extracts the same data"
+)
+parityParser.add_argument(
+    "fixtures",
+    nargs="?",
+    default="fixtures",
+    help="directory of recorded pages (default: %(default)s)",
+)
+parityParser.set_defaults(run=checkParity)
+
+scrapeParser = subParsers.add_parser(
+    "scrape", help="measure the wall time of a scrape replayed from recorded pages"
+)
+scrapeParser.add_argument("fixtures", help="directory of recorded pages")
+scrapeParser.add_argument(
+    "--parser", choices=list(HtmlParser.backends), default=HtmlParser.backend
+)
+scrapeParser.add_argument("--partial-parse", action="store_true")
+scrapeParser.add_argument("--workers", type=int, default=8)
+scrapeParser.add_argument("--parse-workers", type=int, default=0)
+scrapeParser.set_defaults(run=benchmarkScrape)
+
+loadParser = subParsers.add_parser(
+    "load", help="scrape a local mock server at several concurrency levels"
+)
+loadParser.add_argument("fixtures", help="directory of recorded pages")
+loadParser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+loadParser.add_argument("--latency", type=float, default=0.05)
+loadParser.add_argument("--jitter", type=float, default=0.02)
+loadParser.add_argument("--error-rate", type=float, default=0.0)
+loadParser.add_argument("--throttle-rate", type=float, default=0.0)
+loadParser.add_argument("--rate", type=float, default=1000.0)
+loadParser.add_argument("--burst", type=int, default=100)
+loadParser.add_argument("--retries", type=int, default=5)
+loadParser.add_argument("--backoff", type=float, default=0.5)
+loadParser.add_argument(
+    "--adaptive",
+    action="store_true",
+    help="adapt the concurrency with an AIMD controller, up to each workers value",
+)
+loadParser.set_defaults(run=benchmarkLoad)
+
+queryParser = subParsers.add_parser(
+    "query", help="compare indexed queries with a linear scan of a scraper output"
+)
+queryParser.add_argument("cards", help="JSON or NDJSON scraper output")
+queryParser.add_argument("--repeat", type=int, default=1000)
+queryParser.set_defaults(run=benchmarkQuery)
+
+
+if __name__ == "__main__":
+    args = argParser.parse_args()
+    args.run(args)
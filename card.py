@@ -1,7 +1,10 @@
 from mappings import Type, Rarity, AttackCost
-from bs4 import BeautifulSoup
-import requests
-import random
+from fetcher import Fetcher, Page
+from printGraph import PrintGraph
+from parseCache import ParseCache
+from htmlParser import HtmlParser
+from bs4 import SoupStrainer
+from metrics import Metrics
 import time
 import re
 
@@ -11,57 +14,325 @@ class Card:
     Class representing a Card object.
     """
 
-    def __init__(self, url: str) -> None:
+    # The card-text-*, card-image and card-prints-* regions hold every field
+    parseOnly = SoupStrainer(class_=re.compile(r"^card-(text|image|prints)"))
+
+    # Bump when a setter changes what it extracts, so cached data is not reused
+    extractorVersion = 2
+
+    # A reprint only needs its title, artist, image and prints
+    printParseOnly = SoupStrainer(
+        class_=re.compile(r"^card-(text-title|image|prints)|card-text-artist")
+    )
+
+    # Setters run by setAll, in order, the later ones read what the earlier ones set
+    setters = (
+        "setSections",
+        "setID",
+        "setName",
+        "setHP",
+        "setType",
+        "setCardType",
+        "setEvolutionType",
+        "setImage",
+        "setAttacks",
+        "setAbility",
+        "setWeakness",
+        "setRetreat",
+        "setRarity",
+        "setFullArt",
+        "setExStatus",
+        "setSetDetails",
+        "setPack",
+        "setAlternateVersions",
+        "setArtist",
+        "setProbabilities",
+        "setCraftingCost",
+    )
+
+    # Attributes identical on every print of a card, copied between them
+    sharedFields = (
+        "name",
+        "hp",
+        "type",
+        "cardType",
+        "evolutionType",
+        "attacks",
+        "ability",
+        "weakness",
+        "retreat",
+        "ex",
+    )
+
+    # Setters still run on a reprint, for the attributes of the print itself
+    printSetters = (
+        "setSections",
+        "setID",
+        "setImage",
+        "setRarity",
+        "setFullArt",
+        "setSetDetails",
+        "setPack",
+        "setAlternateVersions",
+        "setArtist",
+        "setProbabilities",
+        "setCraftingCost",
+    )
+
+    # Thousands of cards stay alive until the output is written,
+    # slots keep each of them a compact record
+    __slots__ = (
+        "url",
+        "soup",
+        "sections",
+        "id",
+        "name",
+        "hp",
+        "type",
+        "cardType",
+        "evolutionType",
+        "image",
+        "attacks",
+        "ability",
+        "weakness",
+        "retreat",
+        "rarity",
+        "fullart",
+        "ex",
+        "setDetails",
+        "pack",
+        "alternateVersions",
+        "artist",
+        "probabilities",
+        "craftingCost",
+    )
+
+    def __init__(
+        self,
+        url: str,
+        fetcher: Fetcher | None = None,
+        page: Page | None = None,
+        printGraph: PrintGraph | None = None,
+        parseCache: ParseCache | None = None,
+    ) -> None:
         """
         Initialize Card object.
 
         Args:
             - url (str): The URL of the card
+            - fetcher (Fetcher | None): Fetcher used to download the page
+            - page (Page | None): The page if it was already downloaded
+            - printGraph (PrintGraph | None): Prints of the cards already parsed,
+                the fields shared with them are not parsed again
+            - parseCache (ParseCache | None): Data extracted from the card regions seen
+                before, an unchanged region is not parsed again
 
         Returns:
             - None
         """
         self.url = url
+        self.soup = None
+        self.sections = None
+        fetcher = fetcher or Fetcher.getDefault()
 
-        response = requests.get(url)
-        response.raise_for_status()
-        self.soup = BeautifulSoup(response.content, "html.parser")
+        # The fetcher's rate limiter keeps requests from overloading the site
+        if page is None:
+            page = fetcher.get(url, kind="card")
 
-        self.setAll()
+        # An unchanged page already has its data extracted, by this extractor
+        if page.data is not None and page.dataVersion == Card.extractorVersion:
+            self.loadData(page.data)
+            return
 
-        # Random sleep to not overload requests
-        time.sleep(random.random())
+        self.extract(page.content, printGraph, parseCache)
+        fetcher.storeData(url, self.getData(), Card.extractorVersion)
 
-    def setAll(self) -> None:
+    @classmethod
+    def fromData(cls, url: str, data: dict) -> "Card":
+        """
+        Build a Card from the data of a previous run, without downloading it.
+
+        Args:
+            - url (str): The URL of the card
+            - data (dict): Dictionary returned by getData
+
+        Returns:
+            - Card: The card
+        """
+        cardInstance = cls.__new__(cls)
+        cardInstance.url = url
+        cardInstance.soup = None
+        cardInstance.sections = None
+        cardInstance.loadData(data)
+
+        return cardInstance
+
+    @classmethod
+    def fromContent(cls, url: str, content: bytes) -> "Card":
+        """
+        Build a Card from an already downloaded page.
+
+        Args:
+            - url (str): The URL of the card
+            - content (bytes): The HTML of the card page
+
+        Returns:
+            - Card: The card
+        """
+        cardInstance = cls.__new__(cls)
+        cardInstance.url = url
+        cardInstance.extract(content)
+
+        return cardInstance
+
+    def extract(
+        self,
+        content: bytes,
+        printGraph: PrintGraph | None = None,
+        parseCache: ParseCache | None = None,
+    ) -> None:
+        """
+        Parse the card page and set all attributes from it.
+
+        Args:
+            - content (bytes): The HTML of the card page
+            - printGraph (PrintGraph | None): Prints of the cards already parsed
+            - parseCache (ParseCache | None): Data extracted from the card regions seen before
+
+        Returns:
+            - None
+        """
+        key = parseCache.getKey(content) if parseCache else None
+        data = parseCache.get(key) if key else None
+
+        # The card region is unchanged, no tree is built
+        if data is not None:
+            self.loadData(data)
+            return
+
+        shared = printGraph.getShared(self.url) if printGraph else None
+
+        if shared is None:
+            self.soup = HtmlParser.parse(content, Card.parseOnly)
+            self.setAll()
+        else:
+            # Another print was parsed, only what differs between prints is read
+            self.soup = HtmlParser.parse(content, Card.printParseOnly, partial=True)
+
+            for field, value in shared.items():
+                setattr(self, field, value)
+
+            self.setAll(Card.printSetters)
+
+        if printGraph:
+            printGraph.addCard(self.url, self.getVersionUrls(), self.getShared())
+
+        self.releaseSoup()
+
+        if key:
+            parseCache.put(key, self.getData())
+
+    def setAll(self, setters: tuple[str, ...] | None = None) -> None:
         """
         Set all attributes of the card.
 
+        Args:
+            - setters (tuple[str, ...] | None): The setters to run, every setter by default
+
+        Returns:
+            - None
+        """
+        metrics = Metrics.getDefault()
+
+        for setter in setters or Card.setters:
+            start = time.perf_counter()
+            getattr(self, setter)()
+            metrics.observeSetter(setter, time.perf_counter() - start)
+
+    def setSections(self) -> None:
+        """
+        Walk the page once and keep every node the setters read.
+
+        Each entry holds the first matching node, like soup.find would return,
+        except "attacks", "textSections" and "rows" which hold every match
+        in document order, like soup.find_all. The rows are only the ones of
+        the versions table, so a full tree, a partial one and the tree of a
+        reprint give the same versions.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        sections = {
+            "title": None,
+            "type": None,
+            "image": None,
+            "attacks": [],
+            "textSections": [],
+            "ability": None,
+            "weaknessRetreat": None,
+            "versions": None,
+            "current": None,
+            "artist": None,
+            "rows": [],
+        }
+
+        firstMatches = {
+            ("p", "card-text-title"): "title",
+            ("p", "card-text-type"): "type",
+            ("div", "card-image"): "image",
+            ("div", "card-text-ability"): "ability",
+            ("p", "card-text-wrr"): "weaknessRetreat",
+            ("table", "card-prints-versions"): "versions",
+            ("div", "card-prints-current"): "current",
+        }
+
+        for tag in self.soup.find_all(True):
+            classes = tag.get("class") or []
+
+            for className in classes:
+                key = firstMatches.get((tag.name, className))
+                if key and sections[key] is None:
+                    sections[key] = tag
+
+            if tag.name != "div":
+                continue
+
+            if "card-text-attack" in classes:
+                sections["attacks"].append(tag)
+
+            if "card-text-section" in classes:
+                sections["textSections"].append(tag)
+
+            # The artist section is matched on its whole class attribute
+            if (
+                sections["artist"] is None
+                and " ".join(classes) == "card-text-section card-text-artist"
+            ):
+                sections["artist"] = tag
+
+        # Tables elsewhere on the page, like the navigation, are not versions
+        if sections["versions"] is not None:
+            sections["rows"] = sections["versions"].find_all("tr")
+
+        self.sections = sections
+
+    def releaseSoup(self) -> None:
+        """
+        Drop the parsed page once every attribute is set.
+
+        The sections point into the tree too, so both are released.
+
         Args:
             - None
 
         Returns:
             - None
         """
-        self.setID()
-        self.setName()
-        self.setHP()
-        self.setType()
-        self.setCardType()
-        self.setEvolutionType()
-        self.setImage()
-        self.setAttacks()
-        self.setAbility()
-        self.setWeakness()
-        self.setRetreat()
-        self.setRarity()
-        self.setFullArt()
-        self.setExStatus()
-        self.setSetDetails()
-        self.setPack()
-        self.setAlternateVersions()
-        self.setArtist()
-        self.setProbabilities()
-        self.setCraftingCost()
+        self.soup = None
+        self.sections = None
 
     def setID(self) -> None:
         """
@@ -73,7 +344,7 @@ class Card:
         Returns:
             - None
         """
-        titleElement = self.soup.find("p", class_="card-text-title")
+        titleElement = self.sections["title"]
         self.id = int(titleElement.find("a")["href"].split("/")[-1])
 
     def setName(self) -> None:
@@ -86,7 +357,7 @@ class Card:
         Returns:
             - None
         """
-        name = self.soup.find("p", class_="card-text-title").find("a")
+        name = self.sections["title"].find("a")
 
         if not name:
             raise ValueError(f"Card name not found on page: {self.url}")
@@ -103,7 +374,7 @@ class Card:
         Returns:
             - None
         """
-        titleElement = self.soup.find("p", class_="card-text-title")
+        titleElement = self.sections["title"]
         hpText = re.sub(r"\D", "", titleElement.text.split(" - ")[-1])
 
         # If no HP is found (like in trainer cards), set to None
@@ -120,7 +391,7 @@ class Card:
             - None
         """
         cType = None
-        titleElement = self.soup.find("p", class_="card-text-title")
+        titleElement = self.sections["title"]
         if titleElement and titleElement.text:
             parts = titleElement.text.split(" - ")
 
@@ -150,9 +421,7 @@ class Card:
             - None
         """
         # Placeholder for card type logic
-        self.cardType = re.sub(
-            r"\s+", " ", self.soup.find("p", class_="card-text-type").text.strip()
-        )
+        self.cardType = re.sub(r"\s+", " ", self.sections["type"].text.strip())
 
     def setEvolutionType(self) -> None:
         """
@@ -179,7 +448,7 @@ class Card:
         Returns:
             - None
         """
-        self.image = self.soup.find("div", class_="card-image").find("img")["src"]
+        self.image = self.sections["image"].find("img")["src"]
 
     def setAttacks(self) -> None:
         """
@@ -191,7 +460,7 @@ class Card:
         Returns:
             - None
         """
-        attackSections = self.soup.find_all("div", class_="card-text-attack")
+        attackSections = self.sections["attacks"]
         self.attacks = []
 
         for attack in attackSections:
@@ -239,17 +508,16 @@ class Card:
         ability = None
 
         if self.cardType.startswith("Trainer"):
-            abilitySection = self.soup.find("div", class_="card-text-section")
-            if abilitySection:
-                nextSection = abilitySection.find_next(
-                    "div", class_="card-text-section"
-                )
+            textSections = self.sections["textSections"]
+            if textSections:
+                # The effect is in the section following the first one
+                nextSection = textSections[1] if len(textSections) > 1 else None
                 ability = nextSection.text.strip() if nextSection else "No effect"
             else:
                 ability = "No effect"
 
         else:
-            abilitySection = self.soup.find("div", class_="card-text-ability")
+            abilitySection = self.sections["ability"]
             if abilitySection:
                 abilityNameSection = abilitySection.find(
                     "p", class_="card-text-ability-info"
@@ -284,7 +552,7 @@ class Card:
             - None
         """
         weakeness = "N/A"
-        weaknessRetreatSection = self.soup.find("p", class_="card-text-wrr")
+        weaknessRetreatSection = self.sections["weaknessRetreat"]
 
         if weaknessRetreatSection:
             text = [
@@ -306,7 +574,7 @@ class Card:
             - None
         """
         retreat = "N/A"
-        weaknessRetreatSection = self.soup.find("p", class_="card-text-wrr")
+        weaknessRetreatSection = self.sections["weaknessRetreat"]
 
         if weaknessRetreatSection:
             text = [
@@ -328,7 +596,7 @@ class Card:
             - None
         """
         rarity = "Unknown"
-        raritySection = self.soup.find("table", class_="card-prints-versions")
+        raritySection = self.sections["versions"]
 
         if raritySection:
             currentVersion = raritySection.find("tr", class_="current")
@@ -372,7 +640,7 @@ class Card:
             - None
         """
         setDetails = "Unknown"
-        setInfo = self.soup.find("div", class_="card-prints-current")
+        setInfo = self.sections["current"]
 
         if setInfo:
             setDetailsElement = setInfo.find("span", class_="text-lg")
@@ -393,7 +661,7 @@ class Card:
             - None
         """
         pack = None
-        setInfo = self.soup.find("div", class_="card-prints-current")
+        setInfo = self.sections["current"]
 
         if setInfo:
             packTempElement = setInfo.find_all("span")[-1]
@@ -421,7 +689,7 @@ class Card:
             - None
         """
         self.alternateVersions = []
-        versions = self.soup.find_all("tr")
+        versions = self.sections["rows"]
 
         for version in versions:
             versionName = version.find("a")
@@ -456,9 +724,7 @@ class Card:
             - None
         """
         artist = "Unknown"
-        artistSection = self.soup.find(
-            "div", class_="card-text-section card-text-artist"
-        )
+        artistSection = self.sections["artist"]
 
         if artistSection:
             artistLink = artistSection.find("a")
@@ -496,6 +762,68 @@ class Card:
 
         self.craftingCost = craftingCost
 
+    def getVersionUrls(self) -> list[str]:
+        """
+        Get the links of the versions listed on the card page, before the page is released.
+
+        Args:
+            - None
+
+        Returns:
+            - list[str]: The links, the card itself included
+        """
+        versionUrls = []
+
+        for row in self.sections["rows"]:
+            link = row.find("a", href=True)
+            if link:
+                versionUrls.append(link["href"])
+
+        return versionUrls
+
+    def getShared(self) -> dict:
+        """
+        Get the attributes shared by every print of the card.
+
+        Args:
+            - None
+
+        Returns:
+            - dict: The attributes by name
+        """
+        return {field: getattr(self, field) for field in Card.sharedFields}
+
+    def loadData(self, data: dict) -> None:
+        """
+        Set all attributes of the card from the dictionary returned by getData.
+
+        Args:
+            - data (dict): Dictionary containing all card attributes
+
+        Returns:
+            - None
+        """
+        self.id = data["id"]
+        self.name = data["name"]
+        self.hp = data["hp"]
+        self.type = data["type"]
+        self.cardType = data["card_type"]
+        self.evolutionType = data["evolution_type"]
+        self.image = data["image"]
+        self.attacks = data["attacks"]
+        self.ability = data["ability"]
+        self.weakness = data["weakness"]
+        self.retreat = data["retreat"]
+        self.rarity = data["rarity"]
+        self.fullart = data["fullart"]
+        self.ex = data["ex"]
+        self.setDetails = data["set_details"]
+        self.pack = data["pack"]
+        self.alternateVersions = data["alternate_versions"]
+        self.artist = data["artist"]
+        self.probabilities = data["probabilities"]
+        self.craftingCost = data["crafting_cost"]
+
     def getData(self) -> dict:
         """
         Get card data as a dictionary
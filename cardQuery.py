@@ -0,0 +1,351 @@
+from collections.abc import Iterable, Iterator
+import bisect
+import json
+
+
+class CardIndex:
+    """
+    Class indexing the card records returned by Card.getData for fast lookups.
+
+    Categorical fields get a hash index from every value to the positions of
+    its cards, and numeric fields a sorted index searched with bisect, so a
+    query intersects a few small position sets instead of scanning every
+    card. Records are not copied, the index points into the given list.
+    """
+
+    # Fields looked up by value, by their key in the records
+    hashFields = [
+        "name",
+        "type",
+        "card_type",
+        "evolution_type",
+        "rarity",
+        "fullart",
+        "ex",
+        "set_details",
+        "pack",
+        "artist",
+        "weakness",
+    ]
+
+    # Fields looked up by range, cards without a number are left out
+    sortedFields = ["hp", "retreat", "crafting_cost"]
+
+    # Energy types found in the cost of any attack, looked up like a hash field
+    attackCostField = "attack_cost"
+
+    def __init__(self, cards: list[dict]) -> None:
+        """
+        Initialize the CardIndex object, building every index.
+
+        Args:
+            - cards (list[dict]): The card records
+
+        Returns:
+            - None
+        """
+        self.cards = cards
+        self.hashIndexes: dict[str, dict] = {
+            field: {} for field in CardIndex.hashFields + [CardIndex.attackCostField]
+        }
+        self.sortedIndexes: dict[str, tuple[list, list[int]]] = {}
+
+        for position, cardData in enumerate(cards):
+            for field in CardIndex.hashFields:
+                self.hashIndexes[field].setdefault(cardData.get(field), set()).add(
+                    position
+                )
+
+            for energy in {
+                energy
+                for attack in cardData.get("attacks") or []
+                for energy in attack.get("cost") or []
+            }:
+                self.hashIndexes[CardIndex.attackCostField].setdefault(
+                    energy, set()
+                ).add(position)
+
+        for field in CardIndex.sortedFields:
+            pairs = sorted(
+                (cardData.get(field), position)
+                for position, cardData in enumerate(cards)
+                if isinstance(cardData.get(field), (int, float))
+                and not isinstance(cardData.get(field), bool)
+            )
+            self.sortedIndexes[field] = (
+                [value for value, _ in pairs],
+                [position for _, position in pairs],
+            )
+
+    @classmethod
+    def fromFile(cls, path: str) -> "CardIndex":
+        """
+        Index the cards of a scraper output.
+
+        Args:
+            - path (str): The JSON or NDJSON output
+
+        Returns:
+            - CardIndex: The index
+        """
+        with open(path, encoding="utf-8") as file:
+            if path.endswith(".ndjson"):
+                return cls([json.loads(line) for line in file if line.strip()])
+
+            return cls(json.load(file))
+
+    def getValues(self, field: str) -> list:
+        """
+        Get the values of a hash field, with their card count.
+
+        Args:
+            - field (str): The field
+
+        Returns:
+            - list: (value, count) pairs, the most common first
+        """
+        if field not in self.hashIndexes:
+            raise ValueError(f"Field is not indexed by value: {field}")
+
+        return sorted(
+            (
+                (value, len(positions))
+                for value, positions in self.hashIndexes[field].items()
+            ),
+            key=lambda pair: -pair[1],
+        )
+
+    def query(self) -> "Query":
+        """
+        Start a query matching every card.
+
+        Args:
+            - None
+
+        Returns:
+            - Query: The query
+        """
+        return Query(self, None)
+
+    def where(self, **fields) -> "Query":
+        """
+        Start a query on field values, see Query.where.
+
+        Args:
+            - **fields: The values by field
+
+        Returns:
+            - Query: The query
+        """
+        return self.query().where(**fields)
+
+    def between(
+        self, field: str, low: float | None = None, high: float | None = None
+    ) -> "Query":
+        """
+        Start a query on a range of a numeric field, see Query.between.
+
+        Args:
+            - field (str): The field
+            - low (float | None): The lowest value, included, no bound if None
+            - high (float | None): The highest value, included, no bound if None
+
+        Returns:
+            - Query: The query
+        """
+        return self.query().between(field, low, high)
+
+    def getPositions(self, field: str, values: Iterable) -> set[int]:
+        """
+        Get the cards with any of the values of a hash field.
+
+        Args:
+            - field (str): The field
+            - values (Iterable): The values
+
+        Returns:
+            - set[int]: The positions of the cards
+        """
+        if field not in self.hashIndexes:
+            raise ValueError(f"Field is not indexed by value: {field}")
+
+        index = self.hashIndexes[field]
+        matches = [index[value] for value in values if value in index]
+
+        if len(matches) == 1:
+            return matches[0]
+
+        return set().union(*matches)
+
+    def getRange(self, field: str, low: float | None, high: float | None) -> set[int]:
+        """
+        Get the cards whose numeric field is within a range.
+
+        Args:
+            - field (str): The field
+            - low (float | None): The lowest value, included, no bound if None
+            - high (float | None): The highest value, included, no bound if None
+
+        Returns:
+            - set[int]: The positions of the cards
+        """
+        if field not in self.sortedIndexes:
+            raise ValueError(f"Field is not indexed by range: {field}")
+
+        values, positions = self.sortedIndexes[field]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        end = len(values) if high is None else bisect.bisect_right(values, high)
+
+        return set(positions[start:end])
+
+
+class Query:
+    """
+    Class representing a set of cards matched in a CardIndex.
+
+    Every filter returns a new query, intersected with the previous one, so
+    filters compose. Queries on the same index can also be combined with
+    & (both) and | (either).
+    """
+
+    def __init__(self, index: CardIndex, positions: set[int] | None) -> None:
+        """
+        Initialize the Query object.
+
+        Args:
+            - index (CardIndex): The index queried
+            - positions (set[int] | None): The positions of the matched cards, None for every card
+
+        Returns:
+            - None
+        """
+        self.index = index
+        self.positions = positions
+
+    def intersect(self, positions: set[int]) -> "Query":
+        """
+        Keep the matched cards that are also in a set of positions.
+
+        Args:
+            - positions (set[int]): The positions
+
+        Returns:
+            - Query: The new query
+        """
+        if self.positions is None:
+            return Query(self.index, positions)
+
+        return Query(self.index, self.positions & positions)
+
+    def where(self, **fields) -> "Query":
+        """
+        Keep the cards with the given field values.
+
+        A list, tuple or set value matches any of its values. The
+        attack_cost field matches cards with an attack costing that energy.
+
+        Args:
+            - **fields: The values by field, like type="Fire" or rarity=["☆", "☆☆"]
+
+        Returns:
+            - Query: The new query
+        """
+        # The smallest matches first, so every intersection stays small
+        matches = sorted(
+            (
+                self.index.getPositions(
+                    field,
+                    values if isinstance(values, (list, tuple, set)) else [values],
+                )
+                for field, values in fields.items()
+            ),
+            key=len,
+        )
+        query = self
+
+        for positions in matches:
+            query = query.intersect(positions)
+
+        return query
+
+    def between(
+        self, field: str, low: float | None = None, high: float | None = None
+    ) -> "Query":
+        """
+        Keep the cards whose numeric field is within a range.
+
+        Args:
+            - field (str): "hp", "retreat" or "crafting_cost"
+            - low (float | None): The lowest value, included, no bound if None
+            - high (float | None): The highest value, included, no bound if None
+
+        Returns:
+            - Query: The new query
+        """
+        return self.intersect(self.index.getRange(field, low, high))
+
+    def __and__(self, other: "Query") -> "Query":
+        """
+        Get the cards matched by both queries.
+
+        Args:
+            - other (Query): Another query on the same index
+
+        Returns:
+            - Query: The new query
+        """
+        if other.positions is None:
+            return self
+
+        return self.intersect(other.positions)
+
+    def __or__(self, other: "Query") -> "Query":
+        """
+        Get the cards matched by either query.
+
+        Args:
+            - other (Query): Another query on the same index
+
+        Returns:
+            - Query: The new query
+        """
+        if self.positions is None or other.positions is None:
+            return Query(self.index, None)
+
+        return Query(self.index, self.positions | other.positions)
+
+    def count(self) -> int:
+        """
+        Count the matched cards.
+
+        Args:
+            - None
+
+        Returns:
+            - int: The number of cards
+        """
+        if self.positions is None:
+            return len(self.index.cards)
+
+        return len(self.positions)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.getCards())
+
+    def getCards(self) -> list[dict]:
+        """
+        Get the matched cards, in the order of the indexed list.
+
+        Args:
+            - None
+
+        Returns:
+            - list[dict]: The card records
+        """
+        if self.positions is None:
+            return list(self.index.cards)
+
+        return [self.index.cards[position] for position in sorted(self.positions)]
@@ -0,0 +1,183 @@
+from datetime import datetime
+import threading
+import json
+import os
+
+
+class Checkpoint:
+    """
+    Class journaling the finished cards and sets of a scrape, so a failed run can resume.
+
+    The journal is newline-delimited JSON appended as work finishes: one
+    line per card with its extracted data, and one line per set once all
+    its cards are done.
+    """
+
+    def __init__(self, path: str, resume: bool = False) -> None:
+        """
+        Initialize the Checkpoint object.
+
+        Args:
+            - path (str): The path of the journal
+            - resume (bool): Whether to load the journal of a previous run,
+                otherwise it is started from scratch
+
+        Returns:
+            - None
+        """
+        self.path = path
+        self.cards: dict[str, dict] = {}
+        self.sets: dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self.load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.file = open(path, "a", encoding="utf-8")
+
+        # Start on a fresh line after an entry cut short by a crash
+        if self.file.tell() > 0:
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    self.file.write("\n")
+
+    def load(self) -> None:
+        """
+        Load the entries of the journal.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line is cut short if the run died while writing it
+                    continue
+
+                if entry["kind"] == "card":
+                    self.cards[entry["url"]] = entry["data"]
+                elif entry["kind"] == "set":
+                    self.sets[entry["url"]] = entry
+
+    def write(self, entry: dict) -> None:
+        """
+        Append an entry to the journal.
+
+        Args:
+            - entry (dict): The entry
+
+        Returns:
+            - None
+        """
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def getCard(self, url: str) -> dict | None:
+        """
+        Get the data of a finished card.
+
+        Args:
+            - url (str): The URL of the card
+
+        Returns:
+            - dict | None: The card data, or None if the card is not finished
+        """
+        return self.cards.get(url)
+
+    def recordCard(self, url: str, data: dict) -> None:
+        """
+        Record a finished card.
+
+        Args:
+            - url (str): The URL of the card
+            - data (dict): The card data
+
+        Returns:
+            - None
+        """
+        self.write({"kind": "card", "url": url, "data": data})
+
+    def getSet(self, url: str) -> dict | None:
+        """
+        Get a finished set, with the data of its cards.
+
+        Args:
+            - url (str): The URL of the set
+
+        Returns:
+            - dict | None: The set entry with a "cards" list of card data,
+                or None if the set is not finished
+        """
+        entry = self.sets.get(url)
+
+        if entry is None or any(u not in self.cards for u in entry["cardUrls"]):
+            return None
+
+        releaseDate = entry["releaseDate"]
+
+        return {
+            "name": entry["name"],
+            "releaseDate": datetime.fromisoformat(releaseDate) if releaseDate else None,
+            "cardCount": entry["cardCount"],
+            "cards": [(u, self.cards[u]) for u in entry["cardUrls"]],
+        }
+
+    def recordSet(
+        self,
+        url: str,
+        name: str,
+        releaseDate: datetime | None,
+        cardCount: int,
+        cardUrls: list[str],
+    ) -> None:
+        """
+        Record a finished set, once all its cards are recorded.
+
+        Args:
+            - url (str): The URL of the set
+            - name (str): The name of the set
+            - releaseDate (datetime | None): The release date of the set
+            - cardCount (int): The card count announced by the set
+            - cardUrls (list[str]): The URLs of the cards of the set, in order
+
+        Returns:
+            - None
+        """
+        self.write(
+            {
+                "kind": "set",
+                "url": url,
+                "name": name,
+                "releaseDate": releaseDate.isoformat() if releaseDate else None,
+                "cardCount": cardCount,
+                "cardUrls": cardUrls,
+            }
+        )
+
+    def discard(self) -> None:
+        """
+        Close and remove the journal once the scrape has finished.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.file.close()
+        os.remove(self.path)
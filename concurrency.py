@@ -0,0 +1,142 @@
+from metrics import Metrics
+import threading
+import time
+
+
+class AimdController:
+    """
+    Class adapting the number of requests in flight to what the server sustains.
+
+    Like TCP congestion control, the window grows additively, by one request
+    per window of healthy responses, and is cut multiplicatively when the
+    server throttles (429), fails (5xx) or answers much slower than usual.
+    Cuts are at most one per round trip, so a burst of failed requests in
+    flight together only counts once.
+    """
+
+    # Status codes meaning the server is overloaded
+    congestionStatuses = [429, 500, 502, 503, 504]
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        spikeFactor: float = 2.0,
+        smoothing: float = 0.1,
+    ) -> None:
+        """
+        Initialize the AimdController object.
+
+        Args:
+            - initial (int): Requests allowed in flight at first
+            - minimum (int): Smallest window, at least 1
+            - maximum (int): Largest window
+            - increase (float): Requests added to the window per window of healthy responses
+            - decrease (float): Factor the window is multiplied by on congestion
+            - spikeFactor (float): Latency, relative to the usual one, counted as a spike
+            - smoothing (float): Weight of a new response in the usual latency
+
+        Returns:
+            - None
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = float(min(max(initial, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.spikeFactor = spikeFactor
+        self.smoothing = smoothing
+
+        self.inFlight = 0
+        self.latency: float | None = None
+        self.lastDecrease = 0.0
+        self.condition = threading.Condition()
+
+        Metrics.getDefault().setGauge("concurrency_window", self.window)
+
+    def acquire(self) -> None:
+        """
+        Wait until the window has room for one more request.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        with self.condition:
+            while self.inFlight >= int(self.window):
+                self.condition.wait()
+
+            self.inFlight += 1
+
+    def release(self, seconds: float | None, congested: bool) -> None:
+        """
+        Free the place of a finished request and adapt the window to how it went.
+
+        Args:
+            - seconds (float | None): Time the server took, None if it was not requested
+            - congested (bool): Whether the server was overloaded, see isCongestion
+
+        Returns:
+            - None
+        """
+        with self.condition:
+            self.inFlight -= 1
+
+            spike = (
+                seconds is not None
+                and self.latency is not None
+                and seconds > self.spikeFactor * self.latency
+            )
+
+            if congested or spike:
+                self.cut()
+            else:
+                self.window = min(
+                    self.maximum, self.window + self.increase / self.window
+                )
+
+            if seconds is not None and not congested:
+                self.latency = (
+                    seconds
+                    if self.latency is None
+                    else self.latency + self.smoothing * (seconds - self.latency)
+                )
+
+            Metrics.getDefault().setGauge("concurrency_window", self.window)
+            self.condition.notify_all()
+
+    @staticmethod
+    def isCongestion(statuses: list[int]) -> bool:
+        """
+        Check whether status codes show an overloaded server.
+
+        Args:
+            - statuses (list[int]): Status codes of the failed or retried attempts
+
+        Returns:
+            - bool: Whether any of them is a congestion status
+        """
+        return any(status in AimdController.congestionStatuses for status in statuses)
+
+    def cut(self) -> None:
+        """
+        Shrink the window, unless it was already shrunk within the last round trip.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        now = time.monotonic()
+
+        if now - self.lastDecrease < (self.latency or 0):
+            return
+
+        self.window = max(self.minimum, self.window * self.decrease)
+        self.lastDecrease = now
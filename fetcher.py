@@ -0,0 +1,319 @@
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from rateLimiter import RateLimiter
+from fixtureStore import FixtureStore
+from httpCache import HttpCache
+from urllib3.util import Retry
+from metrics import Metrics
+import requests
+import time
+
+
+class Page:
+    """
+    Class representing a downloaded page.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        content: bytes,
+        notModified: bool = False,
+        data: dict | None = None,
+        dataVersion: int | None = None,
+        seconds: float | None = None,
+        retried: list[int] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Initialize Page object.
+
+        Args:
+            - url (str): The URL of the page
+            - content (bytes): The body of the page
+            - notModified (bool): Whether the body was served from the cache after a 304
+            - data (dict | None): Data previously extracted from the unchanged body
+            - dataVersion (int | None): Version of the extractor the data comes from
+            - seconds (float | None): Time the server took to answer, retries included,
+                None if the page was not requested
+            - retried (list[int] | None): Status codes of the attempts that were retried
+            - headers (dict[str, str] | None): The headers of the response
+
+        Returns:
+            - None
+        """
+        self.url = url
+        self.content = content
+        self.notModified = notModified
+        self.data = data
+        self.dataVersion = dataVersion
+        self.seconds = seconds
+        self.retried = retried or []
+        self.headers = headers or {}
+
+
+class RateLimitedRetry(Retry):
+    """
+    Retry policy taking a token from the rate limiter before every new attempt.
+
+    urllib3 sends the retries inside session.get, after the limiter was
+    passed for the first attempt, so without this a failing host would be
+    requested faster than its limit.
+    """
+
+    def __init__(self, *args, rateLimiter: RateLimiter | None = None, **kwargs) -> None:
+        """
+        Initialize the RateLimitedRetry object.
+
+        Args:
+            - *args: The arguments of Retry
+            - rateLimiter (RateLimiter | None): Limiter the retries are counted against
+            - **kwargs: The keyword arguments of Retry
+
+        Returns:
+            - None
+        """
+        super().__init__(*args, **kwargs)
+        self.rateLimiter = rateLimiter
+
+    def new(self, **kwargs) -> "RateLimitedRetry":
+        """
+        Copy the policy with updated counters, as urllib3 does after every attempt.
+
+        Args:
+            - **kwargs: The attributes to update
+
+        Returns:
+            - RateLimitedRetry: The new policy, sharing the limiter
+        """
+        retry = super().new(**kwargs)
+        retry.rateLimiter = self.rateLimiter
+
+        return retry
+
+    def increment(
+        self,
+        method: str | None = None,
+        url: str | None = None,
+        *args,
+        _pool=None,
+        **kwargs,
+    ) -> "RateLimitedRetry":
+        """
+        Count a failed attempt, and wait for the limiter of its host before the next one.
+
+        Args:
+            - method (str | None): The method of the request
+            - url (str | None): The path of the request
+            - *args: The other arguments of Retry.increment
+            - _pool (ConnectionPool | None): The pool of the host
+            - **kwargs: The other keyword arguments of Retry.increment
+
+        Returns:
+            - RateLimitedRetry: The policy of the next attempt
+        """
+        # Raises when the attempts are exhausted, then nothing is sent again
+        retry = super().increment(method, url, *args, _pool=_pool, **kwargs)
+
+        if self.rateLimiter and _pool is not None:
+            self.rateLimiter.acquire(f"{_pool.scheme}://{_pool.host}")
+
+        return retry
+
+
+class Fetcher:
+    """
+    HTTP layer shared by TGCPocket, Set and Card.
+
+    Requests go through one pooled session, so connections are kept alive
+    between pages, and transient failures are retried with backoff. With a
+    cache, pages are revalidated with conditional requests and an unchanged
+    page is served from disk.
+    """
+
+    default = None
+
+    # Status codes worth retrying, they usually clear up on their own
+    retryStatuses = [429, 500, 502, 503, 504]
+
+    def __init__(
+        self,
+        rateLimiter: RateLimiter | None = None,
+        poolSize: int = 10,
+        retries: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 30,
+        cache: HttpCache | None = None,
+        fixtures: FixtureStore | None = None,
+    ) -> None:
+        """
+        Initialize the Fetcher object.
+
+        Args:
+            - rateLimiter (RateLimiter | None): Limiter applied to every request
+            - poolSize (int): Connections kept alive per host, should be at least the worker count
+            - retries (int): Attempts after the first one before giving up on a page
+            - backoff (float): Base of the exponential backoff between retries, in seconds
+            - timeout (float): Seconds to wait for the server before failing a request
+            - cache (HttpCache | None): Cache of the responses, None to always download
+            - fixtures (FixtureStore | None): Store recording every page, or serving
+                them all without network in replay mode
+
+        Returns:
+            - None
+        """
+        self.rateLimiter = rateLimiter or RateLimiter()
+        self.timeout = timeout
+        self.cache = cache
+        self.fixtures = fixtures
+
+        retry = RateLimitedRetry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=Fetcher.retryStatuses,
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            rateLimiter=self.rateLimiter,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=poolSize, pool_maxsize=poolSize, max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(
+        self, url: str, kind: str = "page", headers: dict[str, str] | None = None
+    ) -> Page:
+        """
+        Download a page, waiting for the rate limiter of its host before every attempt.
+
+        Args:
+            - url (str): The URL to download
+            - kind (str): The kind of page, like "card" or "set", for the metrics
+            - headers (dict[str, str] | None): Extra request headers, like the
+                validators of a copy kept by the caller
+
+        Returns:
+            - Page: The page, from the cache if the server reports it unchanged,
+                empty and not modified if the caller's validators still match
+        """
+        if self.fixtures and self.fixtures.mode == "replay":
+            return Page(url, self.fixtures.load(url))
+
+        entry = self.cache.get(url) if self.cache else None
+        headers = dict(headers or {})
+
+        if entry:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.lastModified:
+                headers["If-Modified-Since"] = entry.lastModified
+
+        self.rateLimiter.acquire(url)
+
+        start = time.perf_counter()
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        seconds = time.perf_counter() - start
+        retries = getattr(response.raw, "retries", None)
+        retried = [r.status for r in retries.history if r.status] if retries else []
+
+        Metrics.getDefault().observeRequest(
+            urlparse(url).hostname or "",
+            kind,
+            seconds,
+            len(response.content),
+            len(retries.history) if retries else 0,
+            response.status_code == 304 if self.cache else None,
+        )
+
+        if entry and response.status_code == 304:
+            if self.fixtures:
+                self.fixtures.save(url, entry.content)
+
+            return Page(
+                url,
+                entry.content,
+                notModified=True,
+                data=entry.data,
+                dataVersion=entry.dataVersion,
+                seconds=seconds,
+                retried=retried,
+                headers=response.headers,
+            )
+
+        if response.status_code == 304:
+            return Page(
+                url,
+                b"",
+                notModified=True,
+                seconds=seconds,
+                retried=retried,
+                headers=response.headers,
+            )
+
+        response.raise_for_status()
+
+        if self.fixtures:
+            self.fixtures.save(url, response.content)
+
+        etag = response.headers.get("ETag")
+        lastModified = response.headers.get("Last-Modified")
+
+        # Without validators the page could never be revalidated
+        if self.cache and (etag or lastModified):
+            self.cache.put(url, response.content, etag, lastModified)
+
+        return Page(
+            url,
+            response.content,
+            seconds=seconds,
+            retried=retried,
+            headers=response.headers,
+        )
+
+    def storeData(self, url: str, data: dict, version: int) -> None:
+        """
+        Store the data extracted from a page, to be reused while the page is unchanged.
+
+        Args:
+            - url (str): The URL of the page
+            - data (dict): The extracted data
+            - version (int): Version of the extractor the data comes from
+
+        Returns:
+            - None
+        """
+        if self.cache:
+            self.cache.putData(url, data, version)
+
+    @staticmethod
+    def getDefault() -> "Fetcher":
+        """
+        Get the fetcher used when none is passed explicitly.
+
+        Args:
+            - None
+
+        Returns:
+            - Fetcher: The default fetcher
+        """
+        if Fetcher.default is None:
+            Fetcher.default = Fetcher()
+
+        return Fetcher.default
+
+    @staticmethod
+    def setDefault(fetcher: "Fetcher") -> None:
+        """
+        Replace the fetcher used when none is passed explicitly.
+
+        Args:
+            - fetcher (Fetcher): The new default fetcher
+
+        Returns:
+            - None
+        """
+        Fetcher.default = fetcher
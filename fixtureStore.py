@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+
+
+class FixtureStore:
+    """
+    Class recording downloaded pages to a directory and serving them back without network.
+
+    Every page is a body file plus a metadata file holding its URL, both
+    named after the hash of the URL.
+    """
+
+    modes = ["record", "replay"]
+
+    def __init__(self, directory: str, mode: str) -> None:
+        """
+        Initialize the FixtureStore object.
+
+        Args:
+            - directory (str): Directory holding the fixtures
+            - mode (str): "record" to save the downloaded pages, "replay" to serve them
+
+        Returns:
+            - None
+        """
+        if mode not in FixtureStore.modes:
+            raise ValueError(f"Unknown fixture mode: {mode}")
+
+        if mode == "replay" and not os.path.isdir(directory):
+            raise ValueError(f"Fixture directory not found: {directory}")
+
+        self.directory = directory
+        self.mode = mode
+
+        os.makedirs(directory, exist_ok=True)
+
+    def getPath(self, url: str, extension: str) -> str:
+        """
+        Get the path of a fixture file.
+
+        Args:
+            - url (str): The URL of the page
+            - extension (str): "body" or "json"
+
+        Returns:
+            - str: The path of the file
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def save(self, url: str, content: bytes) -> None:
+        """
+        Record a page.
+
+        Args:
+            - url (str): The URL of the page
+            - content (bytes): The body of the page
+
+        Returns:
+            - None
+        """
+        with open(self.getPath(url, "body"), "wb") as file:
+            file.write(content)
+
+        with open(self.getPath(url, "json"), "w", encoding="utf-8") as file:
+            json.dump({"url": url}, file)
+
+    def load(self, url: str) -> bytes:
+        """
+        Get a recorded page.
+
+        Args:
+            - url (str): The URL of the page
+
+        Returns:
+            - bytes: The body of the page
+        """
+        try:
+            with open(self.getPath(url, "body"), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            raise ValueError(f"No fixture recorded for {url}") from None
+
+    def getUrls(self) -> list[str]:
+        """
+        Get the URLs of every recorded page.
+
+        Args:
+            - None
+
+        Returns:
+            - list[str]: The URLs, sorted
+        """
+        urls = []
+
+        for fileName in os.listdir(self.directory):
+            if fileName.endswith(".json"):
+                with open(
+                    os.path.join(self.directory, fileName), encoding="utf-8"
+                ) as file:
+                    urls.append(json.load(file)["url"])
+
+        return sorted(urls)
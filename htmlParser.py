@@ -0,0 +1,63 @@
+from bs4 import BeautifulSoup, SoupStrainer
+import importlib.util
+
+
+class HtmlParser:
+    """
+    Class building the BeautifulSoup trees of the pages with the selected backend.
+    """
+
+    # Backends by name, with the module each one needs
+    backends = {
+        "html.parser": None,
+        "lxml": "lxml",
+    }
+
+    backend = "html.parser"
+
+    # Whether pages are built only from the regions their class needs
+    partial = False
+
+    @staticmethod
+    def setBackend(name: str) -> None:
+        """
+        Select the backend used to parse every page.
+
+        Args:
+            - name (str): The name of the backend, "html.parser" or "lxml"
+
+        Returns:
+            - None
+        """
+        if name not in HtmlParser.backends:
+            raise ValueError(f"Unknown parser backend: {name}")
+
+        module = HtmlParser.backends[name]
+        if module and importlib.util.find_spec(module) is None:
+            raise ValueError(f"Parser backend {name} needs the {module} package")
+
+        HtmlParser.backend = name
+
+    @staticmethod
+    def parse(
+        content: bytes | str,
+        parseOnly: SoupStrainer | None = None,
+        partial: bool | None = None,
+    ) -> BeautifulSoup:
+        """
+        Parse a page.
+
+        Args:
+            - content (bytes | str): The HTML of the page
+            - parseOnly (SoupStrainer | None): Regions of the page to build in
+                partial mode, the whole page is built without it
+            - partial (bool | None): Whether to build only those regions, the
+                selected mode by default
+
+        Returns:
+            - BeautifulSoup: The parsed page
+        """
+        if not (HtmlParser.partial if partial is None else partial):
+            parseOnly = None
+
+        return BeautifulSoup(content, HtmlParser.backend, parse_only=parseOnly)
@@ -0,0 +1,307 @@
+from collections import OrderedDict
+import threading
+import hashlib
+import json
+import os
+
+
+class CacheEntry:
+    """
+    Class representing a cached response.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        content: bytes,
+        etag: str | None,
+        lastModified: str | None,
+        data: dict | None = None,
+        dataVersion: int | None = None,
+    ) -> None:
+        """
+        Initialize CacheEntry object.
+
+        Args:
+            - url (str): The URL of the response
+            - content (bytes): The body of the response
+            - etag (str | None): The ETag validator sent by the server
+            - lastModified (str | None): The Last-Modified validator sent by the server
+            - data (dict | None): Data extracted from the body, if stored
+            - dataVersion (int | None): Version of the extractor the data comes from
+
+        Returns:
+            - None
+        """
+        self.url = url
+        self.content = content
+        self.etag = etag
+        self.lastModified = lastModified
+        self.data = data
+        self.dataVersion = dataVersion
+
+
+class HttpCache:
+    """
+    Persistent on-disk cache of responses and their validators.
+
+    Every entry is a body file plus a metadata file named after the hash of
+    the URL. The modification time of the body is its last use, which orders
+    the least recently used entries to evict once the size cap is reached.
+    """
+
+    def __init__(self, directory: str, maxBytes: int = 512 * 1024 * 1024) -> None:
+        """
+        Initialize HttpCache object, indexing the entries already on disk.
+
+        Args:
+            - directory (str): Directory holding the cache files
+            - maxBytes (int): Maximum total size of the cached bodies
+
+        Returns:
+            - None
+        """
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.lock = threading.Lock()
+
+        # Key to body size, from least to most recently used
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.totalBytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.loadIndex()
+
+    def loadIndex(self) -> None:
+        """
+        Index the entries on disk by last use.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        found = []
+
+        for fileName in os.listdir(self.directory):
+            if not fileName.endswith(".body"):
+                continue
+
+            key = fileName.removesuffix(".body")
+            if not os.path.exists(self.getPath(key, "json")):
+                continue
+
+            stat = os.stat(self.getPath(key, "body"))
+            found.append((stat.st_mtime, key, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.totalBytes += size
+
+        self.evict()
+
+    def getPath(self, key: str, extension: str) -> str:
+        """
+        Get the path of a cache file.
+
+        Args:
+            - key (str): The key of the entry
+            - extension (str): "body" or "json"
+
+        Returns:
+            - str: The path of the file
+        """
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    @staticmethod
+    def getKey(url: str) -> str:
+        """
+        Get the key of a URL.
+
+        Args:
+            - url (str): The URL
+
+        Returns:
+            - str: The hash identifying the URL in the cache
+        """
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def contains(self, url: str) -> bool:
+        """
+        Check whether a response is cached, without reading it.
+
+        Args:
+            - url (str): The URL of the response
+
+        Returns:
+            - bool: Whether it can be revalidated
+        """
+        with self.lock:
+            return HttpCache.getKey(url) in self.entries
+
+    def get(self, url: str) -> CacheEntry | None:
+        """
+        Get the cached response of a URL, marking it as recently used.
+
+        Args:
+            - url (str): The URL
+
+        Returns:
+            - CacheEntry | None: The entry, or None if the URL is not cached
+        """
+        key = HttpCache.getKey(url)
+
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+
+        try:
+            with open(self.getPath(key, "json"), encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(self.getPath(key, "body"), "rb") as file:
+                content = file.read()
+            os.utime(self.getPath(key, "body"))
+        except (OSError, ValueError):
+            self.remove(key)
+            return None
+
+        return CacheEntry(
+            url,
+            content,
+            meta.get("etag"),
+            meta.get("lastModified"),
+            meta.get("data"),
+            meta.get("dataVersion"),
+        )
+
+    def put(
+        self, url: str, content: bytes, etag: str | None, lastModified: str | None
+    ) -> None:
+        """
+        Store a response, dropping any data extracted from a previous body.
+
+        Args:
+            - url (str): The URL of the response
+            - content (bytes): The body of the response
+            - etag (str | None): The ETag validator sent by the server
+            - lastModified (str | None): The Last-Modified validator sent by the server
+
+        Returns:
+            - None
+        """
+        key = HttpCache.getKey(url)
+
+        self.writeFile(self.getPath(key, "body"), content)
+        self.writeMeta(key, {"url": url, "etag": etag, "lastModified": lastModified})
+
+        with self.lock:
+            self.totalBytes += len(content) - self.entries.get(key, 0)
+            self.entries[key] = len(content)
+            self.entries.move_to_end(key)
+
+        self.evict()
+
+    def putData(self, url: str, data: dict, version: int) -> None:
+        """
+        Store the data extracted from a cached body, so an unchanged page is not parsed again.
+
+        The data is only reused by the same version of the extractor, a
+        fixed extractor reads the unchanged pages again.
+
+        Args:
+            - url (str): The URL of the response
+            - data (dict): The extracted data, it must be JSON serializable
+            - version (int): Version of the extractor the data comes from
+
+        Returns:
+            - None
+        """
+        key = HttpCache.getKey(url)
+
+        with self.lock:
+            if key not in self.entries:
+                return
+
+        try:
+            with open(self.getPath(key, "json"), encoding="utf-8") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        meta["data"] = data
+        meta["dataVersion"] = version
+        self.writeMeta(key, meta)
+
+    def writeMeta(self, key: str, meta: dict) -> None:
+        """
+        Write the metadata file of an entry.
+
+        Args:
+            - key (str): The key of the entry
+            - meta (dict): The metadata
+
+        Returns:
+            - None
+        """
+        self.writeFile(
+            self.getPath(key, "json"),
+            json.dumps(meta, ensure_ascii=False).encode("utf-8"),
+        )
+
+    @staticmethod
+    def writeFile(path: str, content: bytes) -> None:
+        """
+        Write a file atomically, so a crash never leaves a truncated entry.
+
+        Args:
+            - path (str): The path of the file
+            - content (bytes): The content of the file
+
+        Returns:
+            - None
+        """
+        temporaryPath = f"{path}.{threading.get_ident()}.tmp"
+
+        with open(temporaryPath, "wb") as file:
+            file.write(content)
+
+        os.replace(temporaryPath, path)
+
+    def remove(self, key: str) -> None:
+        """
+        Remove an entry.
+
+        Args:
+            - key (str): The key of the entry
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            self.totalBytes -= self.entries.pop(key, 0)
+
+        for extension in ("body", "json"):
+            try:
+                os.remove(self.getPath(key, extension))
+            except FileNotFoundError:
+                pass
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the size cap is respected.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        while True:
+            with self.lock:
+                if self.totalBytes <= self.maxBytes or not self.entries:
+                    return
+                key = next(iter(self.entries))
+
+            self.remove(key)
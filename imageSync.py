@@ -0,0 +1,254 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+from fetcher import Fetcher
+import importlib.util
+import threading
+import requests
+import hashlib
+import json
+import tqdm
+import os
+
+
+def makeThumbnail(source: str, target: str, size: int) -> None:
+    """
+    Write a resized copy of an image, run in a thumbnail process.
+
+    Args:
+        - source (str): The path of the image
+        - target (str): The path of the thumbnail
+        - size (int): The largest side of the thumbnail, in pixels
+
+    Returns:
+        - None
+    """
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temporaryPath = f"{target}.tmp"
+
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        image.save(temporaryPath, format="WEBP")
+
+    os.replace(temporaryPath, target)
+
+
+class ImageStore:
+    """
+    Local copy of the card images, stored by content hash.
+
+    Every image is saved as objects/<hash[:2]>/<hash>.<ext>, so an image
+    shared by several cards is stored once and a changed image never
+    overwrites the previous one. The manifest keeps, for every image URL,
+    its validators, hash and path: unchanged images are only revalidated
+    with a conditional request, and not written again.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fetcher: Fetcher | None = None,
+        workers: int = 8,
+        thumbnailSize: int | None = None,
+        thumbnailWorkers: int | None = None,
+    ) -> None:
+        """
+        Initialize the ImageStore object.
+
+        Args:
+            - directory (str): Directory holding the images and the manifest
+            - fetcher (Fetcher | None): Fetcher used for the images, one without
+                page cache by default, the images have their own store
+            - workers (int): Number of images downloaded in parallel
+            - thumbnailSize (int | None): Largest side of the thumbnails in pixels,
+                None to make no thumbnails
+            - thumbnailWorkers (int | None): Number of thumbnail processes, one per core by default
+
+        Returns:
+            - None
+        """
+        if thumbnailSize and importlib.util.find_spec("PIL") is None:
+            raise ValueError("Thumbnails need the Pillow package")
+
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.fetcher = fetcher or Fetcher(poolSize=max(10, self.workers))
+        self.thumbnailSize = thumbnailSize
+        self.thumbnailWorkers = thumbnailWorkers
+        self.manifestPath = os.path.join(directory, "manifest.json")
+        self.manifest: dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.manifestPath):
+            with open(self.manifestPath, encoding="utf-8") as file:
+                self.manifest = json.load(file)
+
+    def getPath(self, folder: str, digest: str, extension: str) -> str:
+        """
+        Get the path of a stored file.
+
+        Args:
+            - folder (str): "objects" or "thumbnails"
+            - digest (str): The hash of the image
+            - extension (str): The file extension, with its dot
+
+        Returns:
+            - str: The path of the file
+        """
+        return os.path.join(
+            self.directory, folder, digest[:2], f"{digest}{extension}"
+        ).replace(os.sep, "/")
+
+    def sync(self, cards: list[dict]) -> None:
+        """
+        Download the images of the cards and write their local paths in the records.
+
+        Every record gets a "local_image" key, and a "thumbnail" key with
+        thumbnails, None if its image could not be downloaded.
+
+        Args:
+            - cards (list[dict]): The card records, updated in place
+
+        Returns:
+            - None
+        """
+        urls = list(dict.fromkeys(c["image"] for c in cards if c.get("image")))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in tqdm.tqdm(
+                executor.map(self.syncImage, urls), total=len(urls), desc="Images"
+            ):
+                pass
+
+        if self.thumbnailSize:
+            self.makeThumbnails(urls)
+
+        for cardData in cards:
+            entry = self.manifest.get(cardData.get("image"))
+            cardData["local_image"] = entry["path"] if entry else None
+
+            if self.thumbnailSize:
+                cardData["thumbnail"] = entry.get("thumbnail") if entry else None
+
+        self.writeManifest()
+
+    def syncImage(self, url: str) -> None:
+        """
+        Download an image unless the stored copy is still current.
+
+        Args:
+            - url (str): The URL of the image
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            entry = self.manifest.get(url)
+
+        headers = {}
+
+        # Without its file the entry is stale, the image is downloaded again
+        if entry and os.path.exists(entry["path"]):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                headers["If-Modified-Since"] = entry["lastModified"]
+
+        try:
+            page = self.fetcher.get(url, kind="image", headers=headers)
+        except requests.RequestException as error:
+            print(f"WARNING: Image not downloaded: {url} ({error})")
+            return
+
+        if page.notModified:
+            return
+
+        digest = hashlib.sha256(page.content).hexdigest()
+        extension = os.path.splitext(urlparse(url).path)[1].lower() or ".img"
+        path = self.getPath("objects", digest, extension)
+
+        # The same content is already stored, under this URL or another one
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporaryPath = f"{path}.{threading.get_ident()}.tmp"
+
+            with open(temporaryPath, "wb") as file:
+                file.write(page.content)
+
+            os.replace(temporaryPath, path)
+
+        newEntry = {
+            "etag": page.headers.get("ETag"),
+            "lastModified": page.headers.get("Last-Modified"),
+            "sha256": digest,
+            "path": path,
+        }
+
+        with self.lock:
+            self.manifest[url] = newEntry
+
+    def makeThumbnails(self, urls: list[str]) -> None:
+        """
+        Make the missing thumbnails of the images in a pool of processes.
+
+        Args:
+            - urls (list[str]): The URLs of the images
+
+        Returns:
+            - None
+        """
+        pending = {}
+
+        for url in urls:
+            entry = self.manifest.get(url)
+            if entry is None:
+                continue
+
+            target = self.getPath(
+                f"thumbnails/{self.thumbnailSize}", entry["sha256"], ".webp"
+            )
+            if os.path.exists(target):
+                entry["thumbnail"] = target
+            else:
+                pending.setdefault(target, (entry["path"], []))[1].append(entry)
+
+        with ProcessPoolExecutor(max_workers=self.thumbnailWorkers) as executor:
+            futures = {
+                executor.submit(makeThumbnail, source, target, self.thumbnailSize): (
+                    target,
+                    entries,
+                )
+                for target, (source, entries) in pending.items()
+            }
+
+            for future in tqdm.tqdm(futures, desc="Thumbnails"):
+                target, entries = futures[future]
+
+                try:
+                    future.result()
+                except Exception as error:
+                    print(f"WARNING: Thumbnail not made: {target} ({error})")
+                    continue
+
+                for entry in entries:
+                    entry["thumbnail"] = target
+
+    def writeManifest(self) -> None:
+        """
+        Write the manifest.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        temporaryPath = f"{self.manifestPath}.tmp"
+
+        with open(temporaryPath, "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, ensure_ascii=False, indent=4, sort_keys=True)
+
+        os.replace(temporaryPath, self.manifestPath)
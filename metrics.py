@@ -0,0 +1,321 @@
+import threading
+import bisect
+import json
+import math
+
+
+class Histogram:
+    """
+    Class counting observations into cumulative buckets, like a Prometheus histogram.
+    """
+
+    buckets = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf]
+
+    def __init__(self) -> None:
+        """
+        Initialize the Histogram object.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.counts = [0] * len(Histogram.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Count an observation.
+
+        Args:
+            - value (float): The observed value
+
+        Returns:
+            - None
+        """
+        self.counts[bisect.bisect_left(Histogram.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def getCumulativeCounts(self) -> list[int]:
+        """
+        Get the number of observations at or below every bucket bound.
+
+        Args:
+            - None
+
+        Returns:
+            - list[int]: The cumulative counts, in bucket order
+        """
+        cumulative = []
+        total = 0
+
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+
+        return cumulative
+
+
+class Metrics:
+    """
+    Class collecting the measurements of a scrape run.
+
+    Requests are measured by host and page kind, card extraction by setter,
+    and sets by wall time. The run can be exported as a Prometheus textfile
+    or as a JSON report.
+    """
+
+    default = None
+
+    def __init__(self) -> None:
+        """
+        Initialize the Metrics object.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.lock = threading.Lock()
+        self.latencies: dict[tuple[str, str], Histogram] = {}
+        self.bytes: dict[tuple[str, str], int] = {}
+        self.retries: dict[str, int] = {}
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self.setterSeconds: dict[str, float] = {}
+        self.setterCounts: dict[str, int] = {}
+        self.setSeconds: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+
+    def observeRequest(
+        self,
+        host: str,
+        kind: str,
+        seconds: float,
+        size: int,
+        retries: int,
+        cacheHit: bool | None,
+    ) -> None:
+        """
+        Record a finished request.
+
+        Args:
+            - host (str): The host requested
+            - kind (str): The kind of page, like "card" or "set"
+            - seconds (float): The latency of the request, retries included
+            - size (int): The bytes downloaded
+            - retries (int): The number of retries the request needed
+            - cacheHit (bool | None): Whether the cache served the body, None without a cache
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            self.latencies.setdefault((host, kind), Histogram()).observe(seconds)
+            self.bytes[(host, kind)] = self.bytes.get((host, kind), 0) + size
+            self.retries[host] = self.retries.get(host, 0) + retries
+
+            if cacheHit is True:
+                self.cacheHits += 1
+            elif cacheHit is False:
+                self.cacheMisses += 1
+
+    def observeSetter(self, setter: str, seconds: float) -> None:
+        """
+        Record the time a card setter took.
+
+        Args:
+            - setter (str): The name of the setter
+            - seconds (float): The time it took
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            self.setterSeconds[setter] = self.setterSeconds.get(setter, 0) + seconds
+            self.setterCounts[setter] = self.setterCounts.get(setter, 0) + 1
+
+    def observeSet(self, name: str, seconds: float) -> None:
+        """
+        Record the wall time of a set.
+
+        Args:
+            - name (str): The name of the set
+            - seconds (float): The time the set took
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            self.setSeconds[name] = seconds
+
+    def setGauge(self, name: str, value: float) -> None:
+        """
+        Set the current value of a gauge.
+
+        Args:
+            - name (str): The name of the gauge
+            - value (float): The value
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            self.gauges[name] = value
+
+    def getCacheHitRatio(self) -> float | None:
+        """
+        Get the share of cached requests served from the cache.
+
+        Args:
+            - None
+
+        Returns:
+            - float | None: The ratio, or None if no request went through a cache
+        """
+        total = self.cacheHits + self.cacheMisses
+
+        return self.cacheHits / total if total else None
+
+    def getReport(self) -> dict:
+        """
+        Get every measurement as a dictionary.
+
+        Args:
+            - None
+
+        Returns:
+            - dict: The run report
+        """
+        with self.lock:
+            return {
+                "requests": [
+                    {
+                        "host": host,
+                        "kind": kind,
+                        "count": histogram.count,
+                        "seconds": histogram.sum,
+                        "bytes": self.bytes.get((host, kind), 0),
+                        "buckets": {
+                            str(bound): count
+                            for bound, count in zip(
+                                Histogram.buckets, histogram.getCumulativeCounts()
+                            )
+                        },
+                    }
+                    for (host, kind), histogram in sorted(self.latencies.items())
+                ],
+                "retries": dict(self.retries),
+                "cache": {
+                    "hits": self.cacheHits,
+                    "misses": self.cacheMisses,
+                    "hit_ratio": self.getCacheHitRatio(),
+                },
+                "setters": {
+                    setter: {
+                        "seconds": seconds,
+                        "count": self.setterCounts[setter],
+                    }
+                    for setter, seconds in self.setterSeconds.items()
+                },
+                "sets": dict(self.setSeconds),
+                "gauges": dict(self.gauges),
+            }
+
+    def writeReport(self, path: str) -> None:
+        """
+        Write the run report as JSON.
+
+        Args:
+            - path (str): The path of the report
+
+        Returns:
+            - None
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.getReport(), file, ensure_ascii=False, indent=4)
+
+    def writePrometheus(self, path: str) -> None:
+        """
+        Write the measurements in the Prometheus textfile format.
+
+        Args:
+            - path (str): The path of the textfile
+
+        Returns:
+            - None
+        """
+        report = self.getReport()
+        lines = [
+            "# TYPE scraper_request_duration_seconds histogram",
+        ]
+
+        for request in report["requests"]:
+            labels = f'host="{request["host"]}",kind="{request["kind"]}"'
+
+            for bound, count in request["buckets"].items():
+                le = "+Inf" if bound == "inf" else bound
+                lines.append(
+                    f'scraper_request_duration_seconds_bucket{{{labels},le="{le}"}} {count}'
+                )
+
+            lines.append(
+                f"scraper_request_duration_seconds_sum{{{labels}}} {request['seconds']}"
+            )
+            lines.append(
+                f"scraper_request_duration_seconds_count{{{labels}}} {request['count']}"
+            )
+
+        lines.append("# TYPE scraper_downloaded_bytes_total counter")
+        for request in report["requests"]:
+            labels = f'host="{request["host"]}",kind="{request["kind"]}"'
+            lines.append(
+                f"scraper_downloaded_bytes_total{{{labels}}} {request['bytes']}"
+            )
+
+        lines.append("# TYPE scraper_retries_total counter")
+        for host, retries in report["retries"].items():
+            lines.append(f'scraper_retries_total{{host="{host}"}} {retries}')
+
+        lines.append("# TYPE scraper_cache_hits_total counter")
+        lines.append(f"scraper_cache_hits_total {report['cache']['hits']}")
+        lines.append("# TYPE scraper_cache_misses_total counter")
+        lines.append(f"scraper_cache_misses_total {report['cache']['misses']}")
+
+        lines.append("# TYPE scraper_setter_duration_seconds_total counter")
+        for setter, values in report["setters"].items():
+            lines.append(
+                f'scraper_setter_duration_seconds_total{{setter="{setter}"}} {values["seconds"]}'
+            )
+
+        lines.append("# TYPE scraper_set_duration_seconds gauge")
+        for name, seconds in report["sets"].items():
+            name = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'scraper_set_duration_seconds{{set="{name}"}} {seconds}')
+
+        for name, value in report["gauges"].items():
+            lines.append(f"# TYPE scraper_{name} gauge")
+            lines.append(f"scraper_{name} {value}")
+
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def getDefault() -> "Metrics":
+        """
+        Get the metrics every component records into.
+
+        Args:
+            - None
+
+        Returns:
+            - Metrics: The default metrics
+        """
+        if Metrics.default is None:
+            Metrics.default = Metrics()
+
+        return Metrics.default
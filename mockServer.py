@@ -0,0 +1,212 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fixtureStore import FixtureStore
+import threading
+import argparse
+import random
+import time
+
+
+class MockServer:
+    """
+    Local stand-in for the sites the scraper reads, serving recorded pages.
+
+    A request path is looked up in the fixtures under every origin in turn,
+    so the Limitless pages and the Serebii fallback pages are served from
+    the same address. Latency, jitter, errors and throttling are injected
+    to reproduce a loaded server.
+    """
+
+    origins = ["https://pocket.limitlesstcg.com", "https://www.serebii.net"]
+
+    def __init__(
+        self,
+        fixtures: FixtureStore,
+        port: int = 0,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        errorRate: float = 0.0,
+        throttleRate: float = 0.0,
+        retryAfter: int = 1,
+    ) -> None:
+        """
+        Initialize the MockServer object.
+
+        Args:
+            - fixtures (FixtureStore): The recorded pages
+            - port (int): Port to listen on, 0 picks a free one
+            - latency (float): Mean delay before every response, in seconds
+            - jitter (float): Maximum random deviation from the latency, in seconds
+            - errorRate (float): Share of requests answered with a 503
+            - throttleRate (float): Share of requests answered with a 429
+            - retryAfter (int): Seconds sent in the Retry-After header of a 429
+
+        Returns:
+            - None
+        """
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.throttleRate = throttleRate
+        self.retryAfter = retryAfter
+
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "errors": 0, "throttled": 0, "missing": 0}
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.getHandler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """
+        Get the origin the server listens on.
+
+        Args:
+            - None
+
+        Returns:
+            - str: The origin, like http://127.0.0.1:8000
+        """
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def count(self, name: str) -> None:
+        """
+        Increment a request counter.
+
+        Args:
+            - name (str): The name of the counter
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            self.counts[name] += 1
+
+    def getHandler(self) -> type[BaseHTTPRequestHandler]:
+        """
+        Build the request handler class bound to this server.
+
+        Args:
+            - None
+
+        Returns:
+            - type[BaseHTTPRequestHandler]: The handler class
+        """
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:
+                mock.count("requests")
+
+                delay = mock.latency + random.uniform(-mock.jitter, mock.jitter)
+                time.sleep(max(0, delay))
+
+                draw = random.random()
+
+                if draw < mock.throttleRate:
+                    mock.count("throttled")
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(mock.retryAfter))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if draw < mock.throttleRate + mock.errorRate:
+                    mock.count("errors")
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                content = mock.findPage(self.path)
+
+                if content is None:
+                    mock.count("missing")
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+    def findPage(self, path: str) -> bytes | None:
+        """
+        Find the recorded page of a path.
+
+        Args:
+            - path (str): The requested path
+
+        Returns:
+            - bytes | None: The page, or None if it was not recorded
+        """
+        for origin in MockServer.origins:
+            try:
+                return self.fixtures.load(origin + path)
+            except ValueError:
+                continue
+
+        return None
+
+    def start(self) -> None:
+        """
+        Start serving in a background thread.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop serving.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description="Serve recorded pages locally")
+    argParser.add_argument("fixtures", help="directory of recorded pages")
+    argParser.add_argument("--port", type=int, default=8000)
+    argParser.add_argument("--latency", type=float, default=0.05)
+    argParser.add_argument("--jitter", type=float, default=0.02)
+    argParser.add_argument("--error-rate", type=float, default=0.0)
+    argParser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = argParser.parse_args()
+
+    server = MockServer(
+        FixtureStore(args.fixtures, "replay"),
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        errorRate=args.error_rate,
+        throttleRate=args.throttle_rate,
+    )
+
+    print(f"Serving {args.fixtures} on {server.url}/cards")
+    server.start()
+
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
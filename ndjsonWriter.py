@@ -0,0 +1,88 @@
+from tcgPocket import TGCPocket
+from datetime import datetime
+import json
+import set
+import os
+
+
+class NdjsonWriter:
+    """
+    Class writing the cards of every set as newline-delimited JSON as soon as the set is scraped.
+
+    Each line is the getData() dictionary of one card. The file is flushed
+    after every set, so a crashed run keeps the sets finished before it.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the NdjsonWriter object, truncating the file.
+
+        Args:
+            - path (str): The path of the NDJSON file
+
+        Returns:
+            - None
+        """
+        self.path = path
+        self.releaseDates: dict[str, datetime] = {}
+        self.file = open(path, "w", encoding="utf-8")
+
+    def writeSet(self, setInstance: set.Set) -> None:
+        """
+        Append the cards of a set.
+
+        Args:
+            - setInstance (set.Set): The scraped set
+
+        Returns:
+            - None
+        """
+        for cardData in setInstance.getCardData():
+            self.file.write(json.dumps(cardData, ensure_ascii=False) + "\n")
+
+        self.file.flush()
+        self.releaseDates[setInstance.name] = setInstance.releaseDate
+
+    def close(self) -> None:
+        """
+        Close the NDJSON file.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.file.close()
+
+    def finalize(self, outputPath: str) -> None:
+        """
+        Write the sorted JSON output from the NDJSON file.
+
+        Args:
+            - outputPath (str): The path of the JSON output
+
+        Returns:
+            - None
+        """
+        self.close()
+
+        cardLists: dict[str, list[dict]] = {}
+
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    cardData = json.loads(line)
+                    cardLists.setdefault(cardData["set_details"], []).append(cardData)
+
+        # Written aside and moved, so a failure never leaves a truncated output
+        temporaryPath = f"{outputPath}.tmp"
+        with open(temporaryPath, "w", encoding="utf-8") as file:
+            json.dump(
+                TGCPocket.sortCardData(cardLists, self.releaseDates),
+                file,
+                ensure_ascii=False,
+                indent=4,
+            )
+
+        os.replace(temporaryPath, outputPath)
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from metrics import Metrics
+import threading
+import hashlib
+import json
+import os
+
+
+class ParseCache:
+    """
+    Persistent cache of extracted card data, keyed by the card region of the page.
+
+    A page can change outside the card, like in its ads or scripts, while
+    everything the extractor reads stays the same. The key hashes only the
+    region from the card image to the end of the prints table, found by a
+    byte search, so such pages are not parsed again. The whole cache is
+    dropped when the extractor version changes, and the least recently used
+    entries beyond the cap are dropped when it is written.
+    """
+
+    # Class names opening and closing the region every setter reads
+    startMarkers = [b"card-image", b"card-text", b"card-prints"]
+    endMarker = b"card-prints"
+
+    def __init__(self, path: str | None, version: int, maxEntries: int = 10000) -> None:
+        """
+        Initialize the ParseCache object.
+
+        Args:
+            - path (str | None): JSON file keeping the cache between runs, None to keep it in memory
+            - version (int): Version of the extractor the data comes from
+            - maxEntries (int): Number of entries kept when the cache is written
+
+        Returns:
+            - None
+        """
+        self.path = path
+        self.version = version
+        self.maxEntries = maxEntries
+        # Least recently used first, as written by the previous run
+        self.entries: OrderedDict[str, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    cache = json.load(file)
+            except (OSError, ValueError):
+                cache = {}
+
+            if cache.get("version") == version:
+                self.entries = OrderedDict(cache.get("entries", {}))
+
+    @staticmethod
+    def getFragment(content: bytes) -> bytes | None:
+        """
+        Find the card region of a page.
+
+        Args:
+            - content (bytes): The HTML of the card page
+
+        Returns:
+            - bytes | None: The region, or None if the page does not have the markers
+        """
+        starts = [content.find(marker) for marker in ParseCache.startMarkers]
+        starts = [start for start in starts if start != -1]
+        end = content.rfind(ParseCache.endMarker)
+
+        if not starts or end == -1:
+            return None
+
+        # The prints table is the last region read
+        tableEnd = content.find(b"</table>", end)
+        end = tableEnd + len(b"</table>") if tableEnd != -1 else len(content)
+
+        return content[min(starts) : end]
+
+    def getKey(self, content: bytes) -> str | None:
+        """
+        Get the key of a page.
+
+        Args:
+            - content (bytes): The HTML of the card page
+
+        Returns:
+            - str | None: The hash of its card region, None if it has none
+        """
+        fragment = ParseCache.getFragment(content)
+
+        return hashlib.sha256(fragment).hexdigest() if fragment else None
+
+    def get(self, key: str) -> dict | None:
+        """
+        Get the data extracted from a card region.
+
+        Args:
+            - key (str): The key of the page
+
+        Returns:
+            - dict | None: The card data, None if the region was not seen
+        """
+        with self.lock:
+            data = self.entries.get(key)
+
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+
+            return data
+
+    def put(self, key: str, data: dict) -> None:
+        """
+        Store the data extracted from a card region.
+
+        Args:
+            - key (str): The key of the page
+            - data (dict): The card data, it must be JSON serializable
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            self.entries[key] = data
+            self.entries.move_to_end(key)
+
+    def close(self) -> None:
+        """
+        Write the cache without its least recently used entries beyond the cap,
+        and record how often it was used.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        metrics = Metrics.getDefault()
+        metrics.setGauge("parse_cache_hits", self.hits)
+        metrics.setGauge("parse_cache_misses", self.misses)
+
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temporaryPath = f"{self.path}.tmp"
+        with self.lock, open(temporaryPath, "w", encoding="utf-8") as file:
+            # Regions no longer on the site are never hit again
+            while len(self.entries) > self.maxEntries:
+                self.entries.popitem(last=False)
+
+            json.dump(
+                {"version": self.version, "entries": self.entries},
+                file,
+                ensure_ascii=False,
+            )
+
+        os.replace(temporaryPath, self.path)
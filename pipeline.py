@@ -0,0 +1,221 @@
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from collections.abc import Iterator
+from htmlParser import HtmlParser
+from parseCache import ParseCache
+from fetcher import Fetcher, Page
+import threading
+import queue
+import card
+import os
+
+
+def initParser(backend: str, partial: bool) -> None:
+    """
+    Select in a parser process the same parser settings as the main process.
+
+    Args:
+        - backend (str): The parser backend
+        - partial (bool): Whether partial parsing is enabled
+
+    Returns:
+        - None
+    """
+    HtmlParser.backend = backend
+    HtmlParser.partial = partial
+
+
+def parseCard(url: str, content: bytes) -> dict:
+    """
+    Extract the data of a card page, run in a parser process.
+
+    Args:
+        - url (str): The URL of the card
+        - content (bytes): The HTML of the card page
+
+    Returns:
+        - dict: The card data
+    """
+    return card.Card.fromContent(url, content).getData()
+
+
+class CardPipeline:
+    """
+    Two-stage pipeline turning card URLs into cards.
+
+    Download threads fetch the pages and put them in a bounded queue, from
+    which a dispatcher hands them to a pool of parser processes, so parsing
+    is not serialized by the GIL. Both the queue and the number of pages
+    being parsed are bounded: when parsing falls behind, downloads wait.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher | None = None,
+        ioWorkers: int = 8,
+        parseWorkers: int | None = None,
+        queueSize: int = 32,
+        parseCache: ParseCache | None = None,
+    ) -> None:
+        """
+        Initialize the CardPipeline object.
+
+        Args:
+            - fetcher (Fetcher | None): Fetcher used to download the pages
+            - ioWorkers (int): Number of download threads
+            - parseWorkers (int | None): Number of parser processes, one per core by default
+            - queueSize (int): Pages waiting between the stages, and pages being parsed
+            - parseCache (ParseCache | None): Data extracted from the card regions seen
+                before, an unchanged region is not sent to the parser processes
+
+        Returns:
+            - None
+        """
+        self.fetcher = fetcher or Fetcher.getDefault()
+        self.ioWorkers = max(1, ioWorkers)
+        self.queueSize = max(1, queueSize)
+        self.parseCache = parseCache
+        self.executor = ProcessPoolExecutor(
+            max_workers=parseWorkers or os.cpu_count(),
+            initializer=initParser,
+            initargs=(HtmlParser.backend, HtmlParser.partial),
+        )
+
+    def map(self, urls: list[str]) -> Iterator[card.Card]:
+        """
+        Fetch and parse cards, yielding them in the order of the URLs.
+
+        Args:
+            - urls (list[str]): The URLs of the cards
+
+        Returns:
+            - Iterator[card.Card]: The cards
+        """
+        urlQueue: queue.Queue = queue.Queue()
+        pageQueue: queue.Queue = queue.Queue(maxsize=self.queueSize)
+        parsing = threading.Semaphore(self.queueSize)
+        stop = threading.Event()
+        results = [Future() for _ in urls]
+
+        for item in enumerate(urls):
+            urlQueue.put(item)
+
+        def download() -> None:
+            while not stop.is_set():
+                try:
+                    index, url = urlQueue.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    pageQueue.put((index, url, self.fetcher.get(url, kind="card")))
+                except Exception as error:
+                    results[index].set_exception(error)
+
+            pageQueue.put(None)
+
+        def dispatch() -> None:
+            remaining = self.ioWorkers
+
+            while remaining:
+                item = pageQueue.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+
+                index, url, page = item
+                if stop.is_set():
+                    continue
+
+                try:
+                    self.submit(index, url, page, results, parsing)
+                except Exception as error:
+                    # Like a broken parser pool, no later card could be parsed, so
+                    # every pending one fails and the queue is only drained
+                    stop.set()
+
+                    for result in results:
+                        try:
+                            result.set_exception(error)
+                        except InvalidStateError:
+                            pass
+
+        threads = [
+            threading.Thread(target=download, daemon=True)
+            for _ in range(self.ioWorkers)
+        ]
+        threads.append(threading.Thread(target=dispatch, daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            for result in results:
+                yield result.result()
+        finally:
+            stop.set()
+
+    def submit(
+        self,
+        index: int,
+        url: str,
+        page: Page,
+        results: list[Future],
+        parsing: threading.Semaphore,
+    ) -> None:
+        """
+        Hand a downloaded page to the parser processes.
+
+        Args:
+            - index (int): The position of the card in the output
+            - url (str): The URL of the card
+            - page (Page): The downloaded page
+            - results (list[Future]): The results of the cards, by position
+            - parsing (threading.Semaphore): Bound on the pages being parsed
+
+        Returns:
+            - None
+        """
+        # An unchanged page already has its data extracted, by this extractor
+        if page.data is not None and page.dataVersion == card.Card.extractorVersion:
+            results[index].set_result(card.Card.fromData(url, page.data))
+            return
+
+        key = self.parseCache.getKey(page.content) if self.parseCache else None
+        data = self.parseCache.get(key) if key else None
+
+        if data is not None:
+            self.fetcher.storeData(url, data, card.Card.extractorVersion)
+            results[index].set_result(card.Card.fromData(url, data))
+            return
+
+        parsing.acquire()
+        future = self.executor.submit(parseCard, url, page.content)
+
+        def done(future: Future) -> None:
+            parsing.release()
+
+            try:
+                data = future.result()
+            except Exception as error:
+                results[index].set_exception(error)
+                return
+
+            if key:
+                self.parseCache.put(key, data)
+
+            self.fetcher.storeData(url, data, card.Card.extractorVersion)
+            results[index].set_result(card.Card.fromData(url, data))
+
+        future.add_done_callback(done)
+
+    def close(self) -> None:
+        """
+        Stop the parser processes.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.executor.shutdown()
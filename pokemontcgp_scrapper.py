@@ -1,6 +1,26 @@
+from urllib.parse import urlparse
+from concurrency import AimdController
+from htmlParser import HtmlParser
 from tcgPocket import TGCPocket
+from ndjsonWriter import NdjsonWriter
+from fixtureStore import FixtureStore
+from rateLimiter import RateLimiter
+from checkpoint import Checkpoint
+from pipeline import CardPipeline
+from metrics import Metrics
+from profiler import Profiler
+from imageSync import ImageStore
+from printGraph import PrintGraph
+from parseCache import ParseCache
+from card import Card
+from releaseDates import ReleaseDateResolver
+from httpCache import HttpCache
+from fetcher import Fetcher
+import argparse
+import dateutil
 import json
 import time
+import os
 
 
 def formatDuration(seconds: float) -> str:
@@ -23,18 +43,504 @@ def formatDuration(seconds: float) -> str:
         return parts[0]
 
 
-init_time = time.perf_counter()
-filename = "pokemon_cards.json"
+def buildArgParser() -> argparse.ArgumentParser:
+    """
+    Build the command line parser.
 
+    Args:
+        - None
 
-pocket = TGCPocket()
+    Returns:
+        - argparse.ArgumentParser: The parser of every option
+    """
+    argParser = argparse.ArgumentParser(description="Scrape Pokémon TCG Pocket cards")
 
+    output = argParser.add_argument_group("output")
+    output.add_argument(
+        "-o",
+        "--output",
+        metavar="PATH",
+        default="pokemon_cards.json",
+        help="file the cards are written to (default: %(default)s)",
+    )
+    output.add_argument(
+        "--format",
+        choices=["json", "ndjson"],
+        default="json",
+        help="json sorts every card by release date, ndjson writes them set by set"
+        " in table order (default: %(default)s)",
+    )
+    output.add_argument(
+        "--sets",
+        nargs="+",
+        metavar="SET",
+        help="only scrape the sets with these codes or names",
+    )
+    output.add_argument(
+        "--list-sets",
+        action="store_true",
+        help="print the code and name of every set, without scraping them",
+    )
 
-end_time = time.perf_counter()
-print(
-    f"Finished downloading cards to {filename}, total time: {
-        formatDuration(end_time - init_time)}"
-)
+    modes = argParser.add_argument_group("modes")
+    modes.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse the cards of the previous output, only fetching new ones"
+        " and revalidating the cached ones",
+    )
+    modes.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run from its checkpoint",
+    )
+    modes.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        default=".cache/checkpoint.ndjson",
+        help="journal of the finished sets and cards (default: %(default)s)",
+    )
 
-with open(filename, "w", encoding="utf-8") as file:
-    json.dump(pocket.getCardDataSorted(), file, ensure_ascii=False, indent=4)
+    images = argParser.add_argument_group("images")
+    images.add_argument(
+        "--images",
+        metavar="DIRECTORY",
+        help="download the card images to this directory and add their local path"
+        " to the cards",
+    )
+    images.add_argument(
+        "--image-workers",
+        type=int,
+        default=8,
+        help="images downloaded in parallel (default: %(default)s)",
+    )
+    images.add_argument(
+        "--thumbnail-size",
+        type=int,
+        metavar="PIXELS",
+        help="also make thumbnails this large, needs Pillow",
+    )
+
+    dates = argParser.add_argument_group("release dates")
+    dates.add_argument(
+        "--release-date",
+        action="append",
+        default=[],
+        metavar="SET=DATE",
+        help="use this release date for a set, by name, instead of looking it up",
+    )
+    dates.add_argument(
+        "--release-date-memo",
+        metavar="PATH",
+        default=".cache/release-dates.json",
+        help="release dates looked up by previous runs (default: %(default)s)",
+    )
+
+    network = argParser.add_argument_group("network")
+    network.add_argument(
+        "--url",
+        default="https://pocket.limitlesstcg.com/cards",
+        help="page listing the sets (default: %(default)s)",
+    )
+    network.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="cards downloaded in parallel within each set (default: %(default)s)",
+    )
+    network.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="adapt the cards downloaded in parallel to the server latency and errors,"
+        " up to --workers",
+    )
+    network.add_argument(
+        "--rate-limit",
+        type=float,
+        default=5.0,
+        metavar="RPS",
+        help="requests per second to the card site (default: %(default)s)",
+    )
+    network.add_argument(
+        "--burst",
+        type=int,
+        default=5,
+        help="requests allowed at once above the rate limit (default: %(default)s)",
+    )
+    network.add_argument(
+        "--retries",
+        type=int,
+        default=5,
+        help="attempts after the first one before giving up on a page (default: %(default)s)",
+    )
+    network.add_argument(
+        "--timeout",
+        type=float,
+        default=30,
+        help="seconds to wait for the server (default: %(default)s)",
+    )
+    network.add_argument(
+        "--cache-dir",
+        metavar="DIRECTORY",
+        default=".cache/http",
+        help="cache of the downloaded pages, kept between runs (default: %(default)s)",
+    )
+    network.add_argument(
+        "--cache-size",
+        type=int,
+        default=512,
+        metavar="MIB",
+        help="maximum size of the cache (default: %(default)s)",
+    )
+    network.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always download every page",
+    )
+    network.add_argument(
+        "--record",
+        metavar="DIRECTORY",
+        help="save every downloaded page to this directory",
+    )
+    network.add_argument(
+        "--replay",
+        metavar="DIRECTORY",
+        help="serve every page from a recorded directory, without network",
+    )
+
+    parsing = argParser.add_argument_group("parsing")
+    parsing.add_argument(
+        "--parser",
+        choices=list(HtmlParser.backends),
+        default=HtmlParser.backend,
+        help="backend used to parse the pages (default: %(default)s)",
+    )
+    parsing.add_argument(
+        "--partial-parse",
+        action="store_true",
+        help="only build the regions of each page that are read",
+    )
+    parsing.add_argument(
+        "--parse-cache",
+        metavar="PATH",
+        default=".cache/parse-cache.json",
+        help="data extracted from the card pages, reused while their card region"
+        " is unchanged (default: %(default)s)",
+    )
+    parsing.add_argument(
+        "--parse-cache-size",
+        type=int,
+        default=10000,
+        metavar="ENTRIES",
+        help="maximum number of card regions kept in the parse cache"
+        " (default: %(default)s)",
+    )
+    parsing.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="extract every downloaded card page again",
+    )
+    parsing.add_argument(
+        "--no-print-dedup",
+        action="store_true",
+        help="parse every print of a card in full, instead of reusing the fields"
+        " shared with its other prints",
+    )
+    parsing.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="parse card pages in this many processes, 0 parses them in the download threads",
+    )
+
+    diagnostics = argParser.add_argument_group("diagnostics")
+    diagnostics.add_argument(
+        "--profile",
+        metavar="DIRECTORY",
+        help="write a cProfile profile and allocation snapshots per set to this directory",
+    )
+    diagnostics.add_argument(
+        "--metrics-prom",
+        metavar="PATH",
+        help="write the run metrics to this Prometheus textfile",
+    )
+    diagnostics.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="write the run metrics to this JSON report",
+    )
+
+    return argParser
+
+
+def parseArgs(
+    argv: list[str] | None = None, argParser: argparse.ArgumentParser | None = None
+) -> argparse.Namespace:
+    """
+    Parse the command line.
+
+    Args:
+        - argv (list[str] | None): The arguments, the ones of the process by default
+        - argParser (argparse.ArgumentParser | None): The parser, a new one by default
+
+    Returns:
+        - argparse.Namespace: The parsed options
+    """
+    argParser = argParser or buildArgParser()
+    args = argParser.parse_args(argv)
+
+    if args.workers < 1:
+        argParser.error("--workers must be at least 1")
+
+    if args.rate_limit <= 0:
+        argParser.error("--rate-limit must be positive")
+
+    if args.parse_cache_size < 0:
+        argParser.error("--parse-cache-size cannot be negative")
+
+    # The output is rewritten with the scraped sets only, the others would be lost
+    if args.incremental and args.sets:
+        argParser.error("--incremental cannot be combined with --sets")
+
+    args.release_dates = {}
+    for override in args.release_date:
+        name, separator, date = override.rpartition("=")
+
+        try:
+            args.release_dates[name] = dateutil.parser.parse(date)
+        except (ValueError, OverflowError):
+            separator = ""
+
+        if not separator or not name:
+            argParser.error(f"--release-date expects SET=DATE, got {override}")
+
+    return args
+
+
+def loadCards(path: str, format: str) -> list[dict] | None:
+    """
+    Load the cards of an output.
+
+    Args:
+        - path (str): The output
+        - format (str): "json" or "ndjson"
+
+    Returns:
+        - list[dict] | None: The card data, or None without the output
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, encoding="utf-8") as file:
+        if format == "ndjson":
+            return [json.loads(line) for line in file if line.strip()]
+
+        return json.load(file)
+
+
+def writeCards(path: str, format: str, cards: list[dict]) -> None:
+    """
+    Write the cards to an output.
+
+    Args:
+        - path (str): The output
+        - format (str): "json" or "ndjson"
+        - cards (list[dict]): The card data
+
+    Returns:
+        - None
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        if format == "ndjson":
+            for cardData in cards:
+                file.write(json.dumps(cardData, ensure_ascii=False) + "\n")
+        else:
+            json.dump(cards, file, ensure_ascii=False, indent=4)
+
+
+def buildFetcher(args: argparse.Namespace) -> Fetcher:
+    """
+    Build the fetcher every set and card is downloaded with.
+
+    Args:
+        - args (argparse.Namespace): The parsed options
+
+    Returns:
+        - Fetcher: The fetcher
+    """
+    fixtures = None
+    if args.replay:
+        fixtures = FixtureStore(args.replay, "replay")
+    elif args.record:
+        fixtures = FixtureStore(args.record, "record")
+
+    # Kept between weekly runs, so unchanged pages only cost a revalidation
+    cache = None
+    if not args.no_cache:
+        cache = HttpCache(args.cache_dir, maxBytes=args.cache_size * 1024 * 1024)
+
+    host = urlparse(args.url).hostname
+    rateLimiter = RateLimiter(
+        rate=args.rate_limit,
+        burst=args.burst,
+        hostLimits={host: (args.rate_limit, args.burst)},
+    )
+
+    return Fetcher(
+        rateLimiter=rateLimiter,
+        poolSize=max(10, args.workers),
+        retries=args.retries,
+        timeout=args.timeout,
+        cache=cache,
+        fixtures=fixtures,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Scrape the cards and write them to the output.
+
+    Args:
+        - argv (list[str] | None): The arguments, the ones of the process by default
+
+    Returns:
+        - None
+    """
+    argParser = buildArgParser()
+    args = parseArgs(argv, argParser)
+
+    HtmlParser.setBackend(args.parser)
+    HtmlParser.partial = args.partial_parse
+
+    Fetcher.setDefault(buildFetcher(args))
+
+    # The set filter is checked against the table before anything is written
+    if args.sets or args.list_sets:
+        try:
+            pocket = TGCPocket(url=args.url, sets=args.sets, lazy=True)
+        except ValueError as error:
+            argParser.error(str(error))
+
+        if args.list_sets:
+            for setLink in pocket.setLinks:
+                print(f"{setLink['code']}\t{setLink['name']}")
+
+            return
+
+    # Built first, so a missing thumbnail dependency fails before the scrape
+    imageStore = (
+        ImageStore(
+            args.images,
+            workers=args.image_workers,
+            thumbnailSize=args.thumbnail_size,
+        )
+        if args.images
+        else None
+    )
+
+    start = time.perf_counter()
+
+    previous = None
+    if args.incremental:
+        previous = loadCards(args.output, args.format)
+
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+
+    # The cards are streamed next to the output, which is only replaced once
+    # the run succeeds, so a failed incremental run keeps the previous one.
+    # The JSON output is sorted from the stream
+    streamPath = f"{args.output}.tmp"
+    if args.format == "json":
+        streamPath = os.path.splitext(args.output)[0] + ".ndjson"
+
+    profiler = Profiler(args.profile) if args.profile else None
+    if profiler:
+        profiler.start()
+
+    # Every set is written as soon as it is scraped, and its cards released
+    writer = NdjsonWriter(streamPath)
+
+    def onSetComplete(setInstance) -> None:
+        writer.writeSet(setInstance)
+
+        if profiler:
+            profiler.snapshot(setInstance.name)
+
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    parseCache = (
+        None
+        if args.no_parse_cache
+        else ParseCache(
+            args.parse_cache, Card.extractorVersion, maxEntries=args.parse_cache_size
+        )
+    )
+    pipeline = (
+        CardPipeline(
+            ioWorkers=args.workers,
+            parseWorkers=args.parse_workers,
+            parseCache=parseCache,
+        )
+        if args.parse_workers
+        else None
+    )
+
+    resolver = ReleaseDateResolver(args.release_date_memo, overrides=args.release_dates)
+    controller = (
+        AimdController(initial=min(4, args.workers), maximum=args.workers)
+        if args.adaptive
+        else None
+    )
+
+    try:
+        TGCPocket(
+            url=args.url,
+            workers=args.workers,
+            previous=previous,
+            onSetComplete=onSetComplete,
+            keepCards=False,
+            checkpoint=checkpoint,
+            pipeline=pipeline,
+            sets=args.sets,
+            controller=controller,
+            printGraph=None if args.no_print_dedup else PrintGraph(),
+            resolver=resolver,
+            parseCache=parseCache,
+        )
+    finally:
+        resolver.close()
+
+        if parseCache:
+            parseCache.close()
+
+        if pipeline:
+            pipeline.close()
+
+        if profiler:
+            profiler.stop()
+
+    duration = formatDuration(time.perf_counter() - start)
+    print(f"Finished downloading cards to {args.output}, total time: {duration}")
+
+    if args.format == "json":
+        writer.finalize(args.output)
+    else:
+        writer.close()
+        os.replace(streamPath, args.output)
+
+    checkpoint.discard()
+
+    if imageStore:
+        cards = loadCards(args.output, args.format)
+        imageStore.sync(cards)
+        writeCards(args.output, args.format, cards)
+
+    if args.metrics_prom:
+        Metrics.getDefault().writePrometheus(args.metrics_prom)
+
+    if args.metrics_json:
+        Metrics.getDefault().writeReport(args.metrics_json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from urllib.parse import urlparse
+import threading
+
+
+class PrintGraph:
+    """
+    Class grouping the prints of the same card across sets, with union-find.
+
+    Every card page lists the other versions of the card, so each parsed
+    card joins its path with the paths of its versions. The first print of
+    a family to be parsed stores the fields shared by every print, and the
+    later prints reuse them instead of parsing them again.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the PrintGraph object.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.parents: dict[str, str] = {}
+        self.shared: dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def getPath(url: str) -> str:
+        """
+        Get the node of a card, the path of its URL, so links and full URLs match.
+
+        Args:
+            - url (str): The URL or link of the card
+
+        Returns:
+            - str: The path, like /cards/A1/1
+        """
+        return urlparse(url).path.rstrip("/")
+
+    def find(self, path: str) -> str:
+        """
+        Find the root of the family of a print, the lock must be held.
+
+        Args:
+            - path (str): The path of the print
+
+        Returns:
+            - str: The path of the root
+        """
+        root = self.parents.setdefault(path, path)
+
+        while root != self.parents[root]:
+            root = self.parents[root]
+
+        # Point the whole chain at the root, so later finds are direct
+        while path != root:
+            self.parents[path], path = root, self.parents[path]
+
+        return root
+
+    def union(self, first: str, second: str) -> None:
+        """
+        Merge the families of two prints, the lock must be held.
+
+        Args:
+            - first (str): The path of a print
+            - second (str): The path of another print
+
+        Returns:
+            - None
+        """
+        firstRoot = self.find(first)
+        secondRoot = self.find(second)
+
+        if firstRoot == secondRoot:
+            return
+
+        self.parents[secondRoot] = firstRoot
+
+        shared = self.shared.pop(secondRoot, None)
+        if shared is not None:
+            self.shared.setdefault(firstRoot, shared)
+
+    def getShared(self, url: str) -> dict | None:
+        """
+        Get the fields shared by the family of a card.
+
+        Args:
+            - url (str): The URL of the card
+
+        Returns:
+            - dict | None: The shared fields by attribute name, None if no print was parsed yet
+        """
+        with self.lock:
+            return self.shared.get(self.find(PrintGraph.getPath(url)))
+
+    def addCard(self, url: str, versionUrls: list[str], shared: dict) -> None:
+        """
+        Join a parsed card with its versions, and keep its shared fields for them.
+
+        Args:
+            - url (str): The URL of the card
+            - versionUrls (list[str]): The links of the versions listed on its page
+            - shared (dict): The fields shared by every print, by attribute name
+
+        Returns:
+            - None
+        """
+        path = PrintGraph.getPath(url)
+
+        with self.lock:
+            for versionUrl in versionUrls:
+                self.union(path, PrintGraph.getPath(versionUrl))
+
+            self.shared.setdefault(self.find(path), shared)
@@ -0,0 +1,113 @@
+import tracemalloc
+import cProfile
+import re
+import os
+
+
+class Profiler:
+    """
+    Class profiling a scrape with cProfile and tracemalloc.
+
+    The CPU profile is written as a .prof file when the scrape stops, and a
+    snapshot of the top allocations, with the growth since the previous
+    snapshot, is written at every set boundary. From Python 3.12 cProfile
+    sees every thread, so the card workers are included.
+    """
+
+    def __init__(self, directory: str, top: int = 25) -> None:
+        """
+        Initialize the Profiler object.
+
+        Args:
+            - directory (str): Directory receiving the profile and the snapshots
+            - top (int): Number of allocation sites listed in every snapshot
+
+        Returns:
+            - None
+        """
+        self.directory = directory
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.snapshots = 0
+        self.previous = None
+        self.running = False
+
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self) -> None:
+        """
+        Start profiling.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        tracemalloc.start()
+        self.profile.enable()
+        self.running = True
+
+    def snapshot(self, label: str) -> None:
+        """
+        Write the top allocations at this point of the scrape.
+
+        Args:
+            - label (str): What was just finished, like the name of a set
+
+        Returns:
+            - None
+        """
+        # Keep the cost of the snapshot out of the CPU profile
+        if self.running:
+            self.profile.disable()
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+
+        self.snapshots += 1
+        fileName = re.sub(r"[^\w-]+", "_", label).strip("_")
+        path = os.path.join(
+            self.directory, f"allocations-{self.snapshots:02d}-{fileName}.txt"
+        )
+
+        lines = [
+            f"{label}: {current / 1024 / 1024:.1f} MiB traced, {peak / 1024 / 1024:.1f} MiB peak",
+            "",
+            f"Top {self.top} allocation sites:",
+        ]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[: self.top]]
+
+        if self.previous:
+            lines += ["", f"Top {self.top} growths since the previous snapshot:"]
+            lines += [
+                str(stat)
+                for stat in snapshot.compare_to(self.previous, "lineno")[: self.top]
+            ]
+
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+        self.previous = snapshot
+
+        if self.running:
+            self.profile.enable()
+
+    def stop(self) -> None:
+        """
+        Stop profiling and write the CPU profile and a last snapshot.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.profile.disable()
+        self.running = False
+        self.profile.dump_stats(os.path.join(self.directory, "scrape.prof"))
+
+        self.snapshot("end")
+        tracemalloc.stop()
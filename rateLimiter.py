@@ -0,0 +1,125 @@
+from urllib.parse import urlparse
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing a steady rate of requests with short bursts.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        Initialize the TokenBucket object.
+
+        Args:
+            - rate (float): Tokens added per second
+            - burst (int): Maximum number of tokens the bucket can hold
+
+        Returns:
+            - None
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+
+        if burst < 1:
+            raise ValueError(f"Burst must be at least 1, got {burst}")
+
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Take one token, sleeping until it is available.
+
+        The token is reserved under the lock and the wait happens outside it,
+        so concurrent callers queue up in order instead of polling.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Per-host rate limiter, holding one TokenBucket for every host requested.
+    """
+
+    # Limits (requests per second, burst) for hosts that need their own policy
+    hostLimits = {
+        "pocket.limitlesstcg.com": (5.0, 5),
+        "www.serebii.net": (1.0, 1),
+    }
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 5,
+        hostLimits: dict[str, tuple[float, int]] | None = None,
+    ) -> None:
+        """
+        Initialize the RateLimiter object.
+
+        Args:
+            - rate (float): Requests per second for hosts without their own limit
+            - burst (int): Burst size for hosts without their own limit
+            - hostLimits (dict[str, tuple[float, int]] | None): Overrides of the
+                (rate, burst) pair by host
+
+        Returns:
+            - None
+        """
+        self.rate = rate
+        self.burst = burst
+        self.limits = {**RateLimiter.hostLimits, **(hostLimits or {})}
+        self.buckets: dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def getBucket(self, host: str) -> TokenBucket:
+        """
+        Get the bucket of a host, creating it on first use.
+
+        Args:
+            - host (str): The host name
+
+        Returns:
+            - TokenBucket: The bucket shared by every request to the host
+        """
+        with self.lock:
+            bucket = self.buckets.get(host)
+
+            if bucket is None:
+                rate, burst = self.limits.get(host, (self.rate, self.burst))
+                bucket = TokenBucket(rate, burst)
+                self.buckets[host] = bucket
+
+            return bucket
+
+    def acquire(self, url: str) -> None:
+        """
+        Wait until a request to the host of the URL is allowed.
+
+        Args:
+            - url (str): The URL about to be requested
+
+        Returns:
+            - None
+        """
+        self.getBucket(urlparse(url).hostname or "").acquire()
@@ -0,0 +1,172 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from htmlParser import HtmlParser
+from fetcher import Fetcher
+from datetime import datetime
+import threading
+import dateutil
+import json
+import os
+
+
+class ReleaseDateResolver:
+    """
+    Class finding the release dates missing from the set pages, on Serebii.net.
+
+    Lookups run in background threads, started as soon as a set is found to
+    miss its date, so they overlap with the download of its cards. Found
+    dates are kept in a memo file between runs, and manual overrides take
+    precedence over both.
+    """
+
+    default = None
+
+    # Serebii.net pages, by set name without spaces
+    url = "https://www.serebii.net/tcgpocket/"
+
+    def __init__(
+        self,
+        path: str | None = None,
+        overrides: dict[str, datetime] | None = None,
+        fetcher: Fetcher | None = None,
+        workers: int = 2,
+    ) -> None:
+        """
+        Initialize the ReleaseDateResolver object.
+
+        Args:
+            - path (str | None): JSON memo of the dates found by previous runs, None to keep them in memory
+            - overrides (dict[str, datetime] | None): Release dates by set name, used as is
+            - fetcher (Fetcher | None): Fetcher used for Serebii.net, the default one otherwise
+            - workers (int): Number of lookups run at once
+
+        Returns:
+            - None
+        """
+        self.path = path
+        self.overrides = overrides or {}
+        self.fetcher = fetcher
+        self.memo: dict[str, str] = {}
+        self.futures: dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.memo = json.load(file)
+
+    def prefetch(self, name: str) -> None:
+        """
+        Start looking up the release date of a set in the background.
+
+        Args:
+            - name (str): The name of the set
+
+        Returns:
+            - None
+        """
+        with self.lock:
+            if name in self.overrides or name in self.memo or name in self.futures:
+                return
+
+            self.futures[name] = self.executor.submit(self.fetchDate, name)
+
+    def resolve(self, name: str) -> datetime | None:
+        """
+        Get the release date of a set, waiting for its lookup if it is still running.
+
+        Args:
+            - name (str): The name of the set
+
+        Returns:
+            - datetime | None: The release date, None if Serebii.net does not have it
+        """
+        if name in self.overrides:
+            return self.overrides[name]
+
+        self.prefetch(name)
+
+        with self.lock:
+            if name in self.memo:
+                return datetime.fromisoformat(self.memo[name])
+
+            future = self.futures[name]
+
+        return future.result()
+
+    def fetchDate(self, name: str) -> datetime | None:
+        """
+        Look up the release date of a set on Serebii.net, and keep it in the memo.
+
+        Args:
+            - name (str): The name of the set
+
+        Returns:
+            - datetime | None: The release date, None if the page does not have it
+        """
+        fetcher = self.fetcher or Fetcher.getDefault()
+        page = fetcher.get(
+            ReleaseDateResolver.url + name.lower().replace(" ", ""),
+            kind="release-date",
+        )
+        soup = HtmlParser.parse(page.content)
+        date = None
+
+        # Find the <i> tag containing "Release Date:"
+        releaseInfo = soup.find("i", string="Release Date:")
+        if releaseInfo:
+            # Get the parent element and extract the full text
+            parent_text = releaseInfo.parent.get_text(strip=True)
+            # Remove the "Release Date:" label and parse the remaining text
+            date_text = (
+                parent_text.replace("Release Date:", "")
+                .split("Amount of Cards")[0]
+                .strip()
+            )
+            date = dateutil.parser.parse(date_text)
+
+        if date is not None:
+            with self.lock:
+                self.memo[name] = date.isoformat()
+
+        return date
+
+    def close(self) -> None:
+        """
+        Wait for the running lookups and write the memo.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.executor.shutdown()
+
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temporaryPath = f"{self.path}.tmp"
+        with open(temporaryPath, "w", encoding="utf-8") as file:
+            json.dump(self.memo, file, ensure_ascii=False, indent=4, sort_keys=True)
+
+        os.replace(temporaryPath, self.path)
+
+    @staticmethod
+    def getDefault() -> "ReleaseDateResolver":
+        """
+        Get the resolver used when none is passed explicitly.
+
+        Args:
+            - None
+
+        Returns:
+            - ReleaseDateResolver: The default resolver
+        """
+        if ReleaseDateResolver.default is None:
+            ReleaseDateResolver.default = ReleaseDateResolver()
+
+        return ReleaseDateResolver.default
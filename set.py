@@ -1,34 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrency import AimdController
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-import dateutil
+from checkpoint import Checkpoint
+from printGraph import PrintGraph
+from parseCache import ParseCache
+from releaseDates import ReleaseDateResolver
+from datetime import datetime
+from pipeline import CardPipeline
+from fetcher import Fetcher
+from htmlParser import HtmlParser
+from bs4 import SoupStrainer
+from metrics import Metrics
 import requests
+import dateutil
 import card
+import time
+import re
 import tqdm
 
 
 class Set:
-    def __init__(self, url: str) -> None:
+
+    # The infobox and the card grid hold everything the set needs
+    parseOnly = SoupStrainer(class_=re.compile(r"^(infobox|card-search-grid)"))
+
+    def __init__(
+        self,
+        url: str,
+        workers: int = 8,
+        fetcher: Fetcher | None = None,
+        previous: dict[str, list[dict]] | None = None,
+        checkpoint: Checkpoint | None = None,
+        pipeline: CardPipeline | None = None,
+        lazy: bool = False,
+        controller: AimdController | None = None,
+        printGraph: PrintGraph | None = None,
+        resolver: ReleaseDateResolver | None = None,
+        parseCache: ParseCache | None = None,
+    ) -> None:
         """
         Initialize the Set object.
 
         Args:
             - url (str): The URL of the set.
+            - workers (int): Number of cards fetched in parallel, 1 fetches sequentially.
+            - fetcher (Fetcher | None): Fetcher used for the set and its cards.
+            - previous (dict[str, list[dict]] | None): Card data of a previous run by set name,
+                cards found there are reused instead of fetched, or revalidated if cached.
+            - checkpoint (Checkpoint | None): Journal where finished cards are recorded,
+                cards already in it are reused instead of fetched.
+            - pipeline (CardPipeline | None): Pipeline parsing the cards in separate
+                processes, otherwise they are fetched and parsed by the workers.
+            - lazy (bool): Whether the cards are only fetched when they are first requested,
+                otherwise they are fetched with the set.
+            - controller (AimdController | None): Controller adapting the number of cards
+                downloaded in parallel, up to its maximum, instead of the fixed workers.
+            - printGraph (PrintGraph | None): Prints of the cards already parsed, a reprint
+                only parses what differs from them.
+            - resolver (ReleaseDateResolver | None): Resolver looking up the release date
+                when the infobox has none, the default one otherwise.
+            - parseCache (ParseCache | None): Data extracted from the card regions seen
+                before, an unchanged region is not parsed again.
 
         Returns:
             - None
         """
         self.url = url
-
-        response = requests.get(url)
-        response.raise_for_status()
-        self.soup = BeautifulSoup(response.content, "html.parser")
+        self.workers = max(1, workers)
+        self.fetcher = fetcher or Fetcher.getDefault()
+        self.previous = previous or {}
+        self.checkpoint = checkpoint
+        self.pipeline = pipeline
+        self.controller = controller
+        self.printGraph = printGraph
+        self.resolver = resolver or ReleaseDateResolver.getDefault()
+        self.parseCache = parseCache
+        self.cardList: list[card.Card] | None = None
+
+        start = time.perf_counter()
+        page = self.fetcher.get(url, kind="set")
+        self.soup = HtmlParser.parse(page.content, Set.parseOnly)
 
         self.setAll()
-        self.checkAssumptions()
+
+        # Only needed while the attributes are set
+        self.soup = None
+        self.seconds = time.perf_counter() - start
+
+        if not lazy:
+            self.loadCards()
+
+    @classmethod
+    def fromCheckpoint(cls, url: str, entry: dict) -> "Set":
+        """
+        Build a Set finished by an interrupted run, without downloading it.
+
+        Args:
+            - url (str): The URL of the set.
+            - entry (dict): The set as returned by Checkpoint.getSet.
+
+        Returns:
+            - Set: The set
+        """
+        setInstance = cls.__new__(cls)
+        setInstance.url = url
+        setInstance.soup = None
+        setInstance.resolver = None
+        setInstance.name = entry["name"]
+        setInstance.releaseDate = entry["releaseDate"]
+        setInstance.cardCount = entry["cardCount"]
+        setInstance.cardUrls = [cardUrl for cardUrl, _ in entry["cards"]]
+        setInstance.cardList = [
+            card.Card.fromData(cardUrl, data) for cardUrl, data in entry["cards"]
+        ]
+        setInstance.setPacks()
+
+        return setInstance
 
     def setAll(self) -> None:
         """
-        Set all attributes of the Set class based on the URL.
+        Set all attributes of the Set class read from the set page.
 
         Args:
             - None
@@ -39,8 +130,76 @@ class Set:
         self.setName()
         self.setReleaseDate()
         self.setCardCount()
+        self.setCardUrls()
+
+    @property
+    def releaseDate(self) -> datetime | None:
+        """
+        Get the release date of the set, waiting for its lookup if the infobox had none.
+
+        Args:
+            - None
+
+        Returns:
+            - datetime | None: The release date
+        """
+        if self.date is None and self.resolver:
+            self.date = self.resolver.resolve(self.name)
+
+        return self.date
+
+    @releaseDate.setter
+    def releaseDate(self, date: datetime | None) -> None:
+        """
+        Set the release date of the set.
+
+        Args:
+            - date (datetime | None): The release date
+
+        Returns:
+            - None
+        """
+        self.date = date
+
+    @property
+    def cards(self) -> list[card.Card]:
+        """
+        Get the cards of the set, fetching them on first use.
+
+        Args:
+            - None
+
+        Returns:
+            - list[card.Card]: The cards, in grid order
+        """
+        if self.cardList is None:
+            self.loadCards()
+
+        return self.cardList
+
+    def loadCards(self) -> None:
+        """
+        Fetch the cards of the set and record the finished set.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        start = time.perf_counter()
+
         self.setCardInfo()
         self.setPacks()
+        self.checkAssumptions()
+
+        self.seconds += time.perf_counter() - start
+        Metrics.getDefault().observeSet(self.name, self.seconds)
+
+        if self.checkpoint:
+            self.checkpoint.recordSet(
+                self.url, self.name, self.releaseDate, self.cardCount, self.cardUrls
+            )
 
     def setName(self) -> None:
         """
@@ -91,25 +250,9 @@ class Set:
                 if "Promo" not in self.name:
                     print(f"WARNING: Release date not found on page: {self.url}")
 
-                # We use Serebii.net to try and fill in the date
-                url = "https://www.serebii.net/tcgpocket/" + self.name.lower().replace(
-                    " ", ""
-                )
-                response = requests.get(url)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, "html.parser")
-                # Find the <i> tag containing "Release Date:"
-                releaseInfo = soup.find("i", string="Release Date:")
-                if releaseInfo:
-                    # Get the parent element and extract the full text
-                    parent_text = releaseInfo.parent.get_text(strip=True)
-                    # Remove the "Release Date:" label and parse the remaining text
-                    date_text = (
-                        parent_text.replace("Release Date:", "")
-                        .split("Amount of Cards")[0]
-                        .strip()
-                    )
-                    date = dateutil.parser.parse(date_text)
+                # We use Serebii.net to try and fill in the date, looked up
+                # while the cards are fetched and read when first needed
+                self.resolver.prefetch(self.name)
 
         else:
             raise ValueError(f"Release date not found on page: {self.url}")
@@ -146,6 +289,24 @@ class Set:
             raise ValueError(f"Card count not found on page: {self.url}")
         self.cardCount = cardCount
 
+    def setCardUrls(self) -> None:
+        """
+        Set the URLs of the cards in the grid of the set.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        parsedUrl = urlparse(self.url)
+        origin = f"{parsedUrl.scheme}://{parsedUrl.netloc}"
+
+        cardsElement = self.soup.find("div", class_="card-search-grid")
+        self.cardUrls = [
+            f"{origin}{a['href']}" for a in cardsElement.find_all("a", href=True)
+        ]
+
     def setCardInfo(self) -> None:
         """
         Set the card information for the set.
@@ -156,18 +317,99 @@ class Set:
         Returns:
             - None
         """
-        self.cards: list[card.Card] = []
+        cardUrls = self.cardUrls
+
+        # Only the cards missing from the previous run or from the checkpoint
+        # are downloaded. A previous card whose page is cached is revalidated
+        # instead, a conditional request that reuses its data unless it changed
+        previousCards = {data["id"]: data for data in self.previous.get(self.name, [])}
+        cache = self.fetcher.cache
+        knownCards = {}
+
+        for url in cardUrls:
+            data = self.checkpoint.getCard(url) if self.checkpoint else None
+            if data is None and not (cache and cache.contains(url)):
+                data = previousCards.get(Set.getCardId(url))
+            if data is not None:
+                knownCards[url] = card.Card.fromData(url, data)
+
+        newUrls = [url for url in cardUrls if url not in knownCards]
+
+        # With a controller, the threads wait for room in its window
+        workers = self.controller.maximum if self.controller else self.workers
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            newCards = (
+                self.pipeline.map(newUrls)
+                if self.pipeline
+                else executor.map(self.fetchCard, newUrls)
+            )
+
+            for cardInstance in tqdm.tqdm(
+                newCards, total=len(newUrls), desc=f"{self.name} cards"
+            ):
+                if self.checkpoint:
+                    self.checkpoint.recordCard(cardInstance.url, cardInstance.getData())
+
+                knownCards[cardInstance.url] = cardInstance
+
+        # Keep the grid order, cards no longer in the grid are dropped
+        self.cardList = [knownCards[url] for url in cardUrls]
+
+    def fetchCard(self, url: str) -> card.Card:
+        """
+        Fetch a card.
 
-        parsedUrl = urlparse(self.url)
-        origin = f"{parsedUrl.scheme}://{parsedUrl.hostname}"
+        Args:
+            - url (str): The URL of the card.
 
-        cardsElement = self.soup.find("div", class_="card-search-grid")
+        Returns:
+            - card.Card: The card.
+        """
+        if self.controller is None:
+            return card.Card(
+                url=url,
+                fetcher=self.fetcher,
+                printGraph=self.printGraph,
+                parseCache=self.parseCache,
+            )
+
+        # Only the download counts in the window, the card is parsed outside it.
+        # Any failure but an HTTP status that is not throttling counts as congestion
+        self.controller.acquire()
+        seconds = None
+        congested = True
+
+        try:
+            page = self.fetcher.get(url, kind="card")
+            seconds = page.seconds
+            congested = AimdController.isCongestion(page.retried)
+        except requests.HTTPError as error:
+            congested = AimdController.isCongestion([error.response.status_code])
+            raise
+        finally:
+            self.controller.release(seconds, congested)
+
+        return card.Card(
+            url=url,
+            fetcher=self.fetcher,
+            page=page,
+            printGraph=self.printGraph,
+            parseCache=self.parseCache,
+        )
+
+    @staticmethod
+    def getCardId(url: str) -> int:
+        """
+        Get the card number from the URL of a card.
+
+        Args:
+            - url (str): The URL of the card.
 
-        # for a in cardsElement.find_all("a", href=True):
-        for a in tqdm.tqdm(
-            cardsElement.find_all("a", href=True), desc=f"{self.name} cards"
-        ):
-            self.cards.append(card.Card(url=f"{origin}{a['href']}"))
+        Returns:
+            - int: The number of the card in its set.
+        """
+        return int(url.rstrip("/").split("/")[-1])
 
     def setPacks(self) -> None:
         """
@@ -183,6 +425,18 @@ class Set:
             {c.pack for c in self.cards if c.pack != "Every pack"}
         )
 
+    def releaseCards(self) -> None:
+        """
+        Drop the cards once their data has been written elsewhere.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.cardList = []
+
     def checkAssumptions(self) -> None:
         """
         Check assumptions about the cards.
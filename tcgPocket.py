@@ -1,20 +1,104 @@
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-import requests
+from collections.abc import Callable, Iterator
+from concurrency import AimdController
+from checkpoint import Checkpoint
+from printGraph import PrintGraph
+from parseCache import ParseCache
+from releaseDates import ReleaseDateResolver
+from pipeline import CardPipeline
+from datetime import datetime
+from fetcher import Fetcher
+from htmlParser import HtmlParser
+from bs4 import SoupStrainer
+import heapq
 import set
+import re
 
 
 class TGCPocket:
 
-    def __init__(self):
-        self.url = "https://pocket.limitlesstcg.com/cards"
+    # The sets table is the only region needed. While parsing, the strainer
+    # sees the whole class attribute, so the class is matched as a word of it
+    parseOnly = SoupStrainer("table", class_=re.compile(r"(^|\s)sets-table(\s|$)"))
 
-        response = requests.get(self.url)
-        response.raise_for_status()
-        self.soup = BeautifulSoup(response.content, "html.parser")
+    def __init__(
+        self,
+        url: str = "https://pocket.limitlesstcg.com/cards",
+        workers: int = 8,
+        fetcher: Fetcher | None = None,
+        previous: list[dict] | None = None,
+        onSetComplete: Callable[[set.Set], None] | None = None,
+        keepCards: bool = True,
+        checkpoint: Checkpoint | None = None,
+        pipeline: CardPipeline | None = None,
+        sets: list[str] | None = None,
+        lazy: bool = False,
+        controller: AimdController | None = None,
+        printGraph: PrintGraph | None = None,
+        resolver: ReleaseDateResolver | None = None,
+        parseCache: ParseCache | None = None,
+    ) -> None:
+        """
+        Initialize the TGCPocket object.
+
+        Args:
+            - url (str): The URL of the sets table.
+            - workers (int): Number of cards fetched in parallel within each set.
+            - fetcher (Fetcher | None): Fetcher shared by every set and card.
+            - previous (list[dict] | None): Card data of a previous run, for an
+                incremental scrape that only fetches new cards and revalidates the cached ones.
+            - onSetComplete (Callable[[set.Set], None] | None): Called with every set as
+                soon as it is scraped, in order.
+            - keepCards (bool): Whether sets keep their cards once onSetComplete returns,
+                without them memory stays bounded but getCardData is empty.
+            - checkpoint (Checkpoint | None): Journal of the finished sets and cards,
+                the ones already in it are not scraped again.
+            - pipeline (CardPipeline | None): Pipeline parsing the cards of every set
+                in separate processes.
+            - sets (list[str] | None): Codes or names of the sets to scrape, all of them
+                by default.
+            - lazy (bool): Whether sets are only scraped when they are first requested,
+                and their cards only fetched when those are requested, otherwise
+                every set is scraped with the table.
+            - controller (AimdController | None): Controller adapting the number of cards
+                downloaded in parallel, shared by every set.
+            - printGraph (PrintGraph | None): Prints of the cards parsed in every set,
+                so a reprint only parses what differs from the first print.
+            - resolver (ReleaseDateResolver | None): Resolver of the release dates missing
+                from the set pages.
+            - parseCache (ParseCache | None): Data extracted from the card regions seen
+                before, shared by every set.
+
+        Returns:
+            - None
+        """
+        self.url = url
+        self.workers = workers
+        self.fetcher = fetcher or Fetcher.getDefault()
+        self.previous: dict[str, list[dict]] = {}
+        self.onSetComplete = onSetComplete
+        self.keepCards = keepCards
+        self.checkpoint = checkpoint
+        self.pipeline = pipeline
+        self.setFilter = sets
+        self.lazy = lazy
+        self.controller = controller
+        self.printGraph = printGraph
+        self.resolver = resolver
+        self.parseCache = parseCache
+        self.sets: list[set.Set] | None = None
+
+        for cardData in previous or []:
+            self.previous.setdefault(cardData["set_details"], []).append(cardData)
+
+        page = self.fetcher.get(self.url, kind="sets")
+        self.soup = HtmlParser.parse(page.content, TGCPocket.parseOnly)
 
         self.setAll()
 
+        # Only needed while the sets are found
+        self.soup = None
+
     def setAll(self) -> None:
         """
         Set all attributes.
@@ -25,11 +109,14 @@ class TGCPocket:
         Returns:
             - None
         """
-        self.setSets()
+        self.setSetLinks()
 
-    def setSets(self) -> None:
+        if not self.lazy:
+            self.setSets()
+
+    def setSetLinks(self) -> None:
         """
-        Set the card sets.
+        Set the URL, code and name of every set in the table, keeping the ones in the filter.
 
         Args:
             - None
@@ -37,10 +124,10 @@ class TGCPocket:
         Returns:
             - None
         """
-        self.sets: list[set.Set] = []
+        self.setLinks: list[dict[str, str]] = []
 
         parsedUrl = urlparse(self.url)
-        origin = f"{parsedUrl.scheme}://{parsedUrl.hostname}"
+        origin = f"{parsedUrl.scheme}://{parsedUrl.netloc}"
 
         setsElement = self.soup.find("table", class_="data-table sets-table striped")
 
@@ -48,7 +135,109 @@ class TGCPocket:
             link = row.find("a", href=True)
 
             if link:
-                self.sets.append(set.Set(f"{origin}{link['href']}"))
+                code = link["href"].rstrip("/").split("/")[-1]
+                name = link.get_text(" ", strip=True).removesuffix(code).strip()
+
+                self.setLinks.append(
+                    {"url": f"{origin}{link['href']}", "code": code, "name": name}
+                )
+
+        if self.setFilter:
+            # Codes and names are matched case-insensitively
+            wanted = {setName.lower() for setName in self.setFilter}
+            known = {
+                key
+                for setLink in self.setLinks
+                for key in (setLink["code"].lower(), setLink["name"].lower())
+            }
+
+            if wanted - known:
+                raise ValueError(f"Sets not found: {', '.join(sorted(wanted - known))}")
+
+            self.setLinks = [
+                setLink
+                for setLink in self.setLinks
+                if {setLink["code"].lower(), setLink["name"].lower()} & wanted
+            ]
+
+    def setSets(self) -> None:
+        """
+        Set the card sets.
+
+        Args:
+            - None
+
+        Returns:
+            - None
+        """
+        self.sets = list(self.iterSets())
+
+    def getSets(self) -> list[set.Set]:
+        """
+        Get the sets, scraping them on first use.
+
+        Args:
+            - None
+
+        Returns:
+            - list[set.Set]: The sets, in table order
+        """
+        if self.sets is None:
+            self.setSets()
+
+        return self.sets
+
+    def iterSets(self) -> Iterator[set.Set]:
+        """
+        Scrape the sets one at a time, in table order.
+
+        Args:
+            - None
+
+        Returns:
+            - Iterator[set.Set]: The sets
+        """
+        for setLink in self.setLinks:
+            setInstance = self.buildSet(setLink["url"])
+
+            if self.onSetComplete:
+                self.onSetComplete(setInstance)
+
+            if not self.keepCards:
+                setInstance.releaseCards()
+
+            yield setInstance
+
+    def buildSet(self, url: str) -> set.Set:
+        """
+        Scrape a set, or restore it from the checkpoint if it was already finished.
+
+        A lazy set only downloads its page, its cards are fetched, and the
+        set recorded in the checkpoint, when they are first requested.
+
+        Args:
+            - url (str): The URL of the set
+
+        Returns:
+            - set.Set: The set
+        """
+        entry = self.checkpoint.getSet(url) if self.checkpoint else None
+        if entry is not None:
+            return set.Set.fromCheckpoint(url, entry)
+
+        return set.Set(
+            url,
+            workers=self.workers,
+            fetcher=self.fetcher,
+            previous=self.previous,
+            checkpoint=self.checkpoint,
+            pipeline=self.pipeline,
+            lazy=self.lazy,
+            controller=self.controller,
+            printGraph=self.printGraph,
+            resolver=self.resolver,
+            parseCache=self.parseCache,
+        )
 
     def getCardData(self) -> list[dict]:
         """
@@ -62,18 +251,16 @@ class TGCPocket:
         """
         cardData = []
 
-        for setInstance in self.sets:
+        for setInstance in self.getSets():
             cardData.extend(setInstance.getCardData())
 
         return cardData
 
     def getCardDataSorted(self) -> list[dict]:
         """
-        Get card data from all sets, sorted by id.
-
-        TODO: Sort by the date the set was released
-            and then by the card number in the set,
-            because the id is repeated across sets.
+        Get card data from all sets, sorted by the date the set was released
+        and then by the card number in the set, because the id is repeated
+        across sets.
 
         Args:
             - None
@@ -81,14 +268,41 @@ class TGCPocket:
         Returns:
             - list[dict]: List of dictionaries containing card data
         """
-        cardData = self.getCardData()
+        cardLists: dict[str, list[dict]] = {}
 
-        sortedCardData = sorted(
-            cardData,
-            key=lambda card: (
-                {s.name: s for s in self.sets}[card["set_details"]].releaseDate,
-                int(card["id"]),
-            ),
-        )
+        sets = self.getSets()
+
+        for setInstance in sets:
+            cardLists.setdefault(setInstance.name, []).extend(setInstance.getCardData())
+
+        return TGCPocket.sortCardData(cardLists, {s.name: s.releaseDate for s in sets})
+
+    @staticmethod
+    def sortCardData(
+        cardLists: dict[str, list[dict]], releaseDates: dict[str, datetime]
+    ) -> list[dict]:
+        """
+        Merge the card data of every set, ordered by the release date of the set and then by id.
+
+        Each set is ranked once by release date, and the per-set lists, already
+        in card number order, are merged. Sets released the same day share a
+        rank, so their cards are interleaved by number, the earlier set first.
+
+        Args:
+            - cardLists (dict[str, list[dict]]): Card data of every set by name, in set order
+            - releaseDates (dict[str, datetime]): Release date of every set by name
+
+        Returns:
+            - list[dict]: The sorted card data
+        """
+        dates = sorted({releaseDates[name] for name in cardLists})
+        dateRanks = {date: rank for rank, date in enumerate(dates)}
+        setRanks = {name: dateRanks[releaseDates[name]] for name in cardLists}
+
+        def cardKey(card: dict) -> tuple[int, int]:
+            return setRanks[card["set_details"]], int(card["id"])
+
+        # Cheap on lists that are already in order, and keeps the merge correct if not
+        sortedLists = [sorted(cards, key=cardKey) for cards in cardLists.values()]
 
-        return sortedCardData
+        return list(heapq.merge(*sortedLists, key=cardKey))